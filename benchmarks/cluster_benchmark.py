@@ -0,0 +1,392 @@
+from frost_mpc.node import Node
+from frost_mpc.dkg import Dkg
+from frost_mpc.sa import SA
+from frost_mpc.abstract.data_manager import DataManager
+from frost_mpc.abstract.node_info import NodeInfo
+from frost_mpc.common.libp2p_base import Libp2pBase
+from frost_mpc.common.nonce_pool import NoncePool
+from frost_mpc.common.nonce_store import NonceStore
+from frost_mpc.common.executor import CryptoExecutor, EXECUTOR_MODES
+from frost_mpc.common.loopback import LoopbackNetwork
+from frost_mpc.common.utils import Utils
+
+from typing import Dict, List, Tuple
+
+import subprocess
+import resource
+import platform
+import argparse
+import datetime
+import hashlib
+import logging
+import timeit
+import json
+import time
+import trio
+import sys
+import os
+
+
+class BenchmarkDataManager(DataManager):
+    # In-memory store, so the benchmark measures the protocol and not the disk
+    def __init__(self) -> None:
+        self.__dkg_keys = {}
+        self.__nonces = NonceStore()
+
+    def set_nonces(self, nonces_list: List) -> None:
+        self.__nonces.replace_values(nonces_list)
+
+    def get_nonces(self) -> List:
+        return self.__nonces.values()
+
+    def add_nonces(self, nonces: Dict[str, Dict], replace: bool = False, max_size: int = None) -> int:
+        return self.__nonces.add(nonces, replace, max_size)
+
+    def pop_nonce(self, commitment_key: str) -> Dict:
+        return self.__nonces.pop(commitment_key)
+
+    def get_nonces_count(self) -> int:
+        return len(self.__nonces)
+
+    def set_dkg_key(self, key, value) -> None:
+        self.__dkg_keys[key] = value
+
+    def get_dkg_key(self, key):
+        return self.__dkg_keys.get(key, {})
+
+
+class BenchmarkNodeInfo(NodeInfo):
+    def __init__(self, nodes: Dict[str, Dict]) -> None:
+        self.nodes = nodes
+
+    def lookup_node(self, peer_id: str):
+        return self.nodes.get(peer_id, None)
+
+    def get_all_nodes(self, n: int = None) -> List[str]:
+        if n is not None:
+            return list(self.nodes.keys())[:n]
+        return list(self.nodes.keys())
+
+
+def data_validator(input_data: Dict) -> Dict:
+    return {
+        'data': input_data,
+        'hash': hashlib.sha3_256(json.dumps(input_data).encode()).hexdigest(),
+    }
+
+
+def make_cluster(size: int, base_port: int) -> Dict:
+    # Fresh identities on loopback; the coordinator (Dkg + SA) listens on base_port
+    coordinator = Utils.generate_secret_and_peer_id()
+    nodes = {}
+    secrets = {}
+    for index in range(size):
+        identity = Utils.generate_secret_and_peer_id()
+        nodes[identity['peer_id']] = {
+            'ip': '127.0.0.1',
+            'port': str(base_port + index + 1),
+            'public_key': identity['public_key'],
+            'staking_id': str(index + 1),
+        }
+        secrets[identity['peer_id']] = identity['secret']
+    return {
+        'coordinator': {
+            'peer_id': coordinator['peer_id'],
+            'secret': coordinator['secret'],
+            'address': {'ip': '127.0.0.1', 'port': str(base_port)},
+        },
+        'nodes': nodes,
+        'secrets': secrets,
+    }
+
+
+def make_node(cluster: Dict, peer_id: str, executor_mode: str, pregenerate: bool,
+              network: LoopbackNetwork = None) -> Node:
+    node_info = BenchmarkNodeInfo(cluster['nodes'])
+    coordinator_id = cluster['coordinator']['peer_id']
+    executor = CryptoExecutor(executor_mode)
+    nonce_pool = NoncePool(executor) if pregenerate else NoncePool(
+        executor, low_watermark=0, high_watermark=0)
+    secret = cluster['secrets'][peer_id]
+    host = network.create_host(secret) if network is not None else None
+    return Node(BenchmarkDataManager(), node_info.lookup_node(peer_id), secret,
+                node_info, lambda sender_id, protocol: sender_id == coordinator_id, data_validator,
+                executor=executor, nonce_pool=nonce_pool, host=host)
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    if len(samples) == 0:
+        return {}
+    ordered = sorted(samples)
+
+    def rank(percent: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, int(round(percent / 100 * len(ordered) + 0.5)) - 1))]
+    return {
+        'count': len(ordered),
+        'mean': sum(ordered) / len(ordered),
+        'p50': rank(50),
+        'p90': rank(90),
+        'p99': rank(99),
+        'max': ordered[-1],
+    }
+
+
+class Role:
+    # Participants of one role and their executors; bytes and crypto CPU are read per
+    # instance, since roles sharing a process also share the metrics registry
+    def __init__(self, participants: List[Libp2pBase], executors: List[CryptoExecutor]) -> None:
+        self.participants = participants
+        self.executors = executors
+
+    def usage(self) -> Tuple[int, float]:
+        return (sum(participant.bytes_sent + participant.bytes_received for participant in self.participants),
+                sum(executor.cpu_seconds for executor in self.executors))
+
+
+class Scenario:
+    # Collects latency, CPU and traffic for one kind of operation. Every message goes between
+    # the coordinator and a node, so the coordinator's bytes are the bytes on the wire
+    def __init__(self, name: str, threshold: int, n: int, coordinator: Role, nodes: Role = None) -> None:
+        self.name = name
+        self.threshold = threshold
+        self.n = n
+        self.coordinator = coordinator
+        self.nodes = nodes
+        self.latencies: List[float] = []
+        self.failures = 0
+
+    def __enter__(self) -> 'Scenario':
+        self.__start = timeit.default_timer()
+        self.__cpu = time.process_time()
+        self.__coordinator = self.coordinator.usage()
+        self.__nodes = self.nodes.usage() if self.nodes is not None else None
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.elapsed = timeit.default_timer() - self.__start
+        # Everything in this process: the coordinator, plus the nodes unless they are subprocesses
+        self.cpu_seconds = time.process_time() - self.__cpu
+        coordinator = self.coordinator.usage()
+        self.bytes = coordinator[0] - self.__coordinator[0]
+        self.coordinator_crypto_cpu_seconds = coordinator[1] - self.__coordinator[1]
+        self.node_bytes = None
+        self.node_crypto_cpu_seconds = None
+        if self.nodes is not None:
+            nodes = self.nodes.usage()
+            self.node_bytes = nodes[0] - self.__nodes[0]
+            self.node_crypto_cpu_seconds = nodes[1] - self.__nodes[1]
+
+    def result(self) -> Dict:
+        return {
+            'scenario': self.name,
+            'threshold': self.threshold,
+            'n': self.n,
+            'latency': percentiles(self.latencies),
+            'failures': self.failures,
+            'seconds': self.elapsed,
+            'throughput_per_second': len(self.latencies) / self.elapsed if self.elapsed > 0 else 0.0,
+            'cpu_seconds': self.cpu_seconds,
+            'coordinator_crypto_cpu_seconds': self.coordinator_crypto_cpu_seconds,
+            'node_crypto_cpu_seconds': self.node_crypto_cpu_seconds,
+            'bytes': self.bytes,
+            'node_bytes': self.node_bytes,
+        }
+
+
+async def run_party(dkg: Dkg, sa: SA, node_info: NodeInfo, threshold: int, n: int, args,
+                    coordinator: Role, nodes: Role = None) -> List[Dict]:
+    party = node_info.get_all_nodes(n)
+    results = []
+
+    dkg_key = None
+    with Scenario('dkg', threshold, n, coordinator, nodes) as scenario:
+        for _ in range(args.dkgs):
+            start = timeit.default_timer()
+            response = await dkg.request_dkg(threshold, party, 'benchmark', node_info)
+            scenario.latencies.append(timeit.default_timer() - start)
+            if response['result'] == 'SUCCESSFUL':
+                dkg_key = response
+            else:
+                scenario.failures += 1
+    results.append(scenario.result())
+
+    with Scenario('nonces', threshold, n, coordinator, nodes) as scenario:
+        for _ in range(args.nonce_requests):
+            start = timeit.default_timer()
+            response = await sa.request_nonces(party, args.nonces)
+            scenario.latencies.append(timeit.default_timer() - start)
+            for peer_id, data in response.items():
+                if data['status'] == 'SUCCESSFUL':
+                    sa.commitment_manager.add(peer_id, data['nonces'], data.get('pool'))
+                else:
+                    scenario.failures += 1
+    results.append(scenario.result())
+
+    if dkg_key is None:
+        return results
+    with Scenario('sign', threshold, n, coordinator, nodes) as scenario:
+        for _ in range(args.signs):
+            commitments_dict = await sa.commitment_manager.take(party)
+            start = timeit.default_timer()
+            response = await sa.request_signature(dkg_key, commitments_dict, {'data': 'benchmark'}, party)
+            scenario.latencies.append(timeit.default_timer() - start)
+            if response['result'] != 'SUCCESSFUL':
+                scenario.failures += 1
+    results.append(scenario.result())
+    return results
+
+
+async def run_coordinator(cluster: Dict, parties: List[Tuple[int, int]], args, nursery_setup=None,
+                          network: LoopbackNetwork = None, nodes: List[Node] = None) -> List[Dict]:
+    node_info = BenchmarkNodeInfo(cluster['nodes'])
+    coordinator = cluster['coordinator']
+    executor = CryptoExecutor(args.executor)
+    host = network.create_host(coordinator['secret']) if network is not None else None
+    dkg = Dkg(coordinator['address'], coordinator['secret'], node_info,
+              default_timeout=args.timeout, host=host, executor=executor,
+              round1_bundle=not args.no_round1_bundle, binary_codec=args.binary_codec)
+    sa = SA(coordinator['address'], coordinator['secret'], node_info, default_timeout=args.timeout,
+            host=dkg.host, connection_pool=dkg.connection_pool, executor=executor,
+            binary_codec=args.binary_codec)
+    coordinator_role = Role([dkg, sa], [executor])
+    node_role = Role(nodes, [node.executor for node in nodes]) if nodes is not None else None
+    results = []
+    async with trio.open_nursery() as nursery:
+        if nursery_setup is not None:
+            nursery_setup(nursery)
+        nursery.start_soon(dkg.run)
+        await trio.sleep(args.startup_delay)
+        for threshold, n in parties:
+            logging.warning(f'Benchmarking {threshold} of {n}')
+            results += await run_party(dkg, sa, node_info, threshold, n, args, coordinator_role, node_role)
+        dkg.stop()
+        nursery.cancel_scope.cancel()
+    return results
+
+
+async def run_in_process(cluster: Dict, parties: List[Tuple[int, int]], args) -> List[Dict]:
+    # loopback mode swaps TCP for in-memory streams, leaving only the protocol logic to measure
+    network = LoopbackNetwork() if args.mode == 'loopback' else None
+    nodes = [make_node(cluster, peer_id, args.executor, args.pregenerate, network)
+             for peer_id in cluster['nodes']]
+
+    def start_nodes(nursery: trio.Nursery) -> None:
+        for node in nodes:
+            nursery.start_soon(node.run)
+    return await run_coordinator(cluster, parties, args, start_nodes, network, nodes)
+
+
+def run_subprocesses(cluster: Dict, parties: List[Tuple[int, int]], args, config_path: str) -> List[Dict]:
+    with open(config_path, 'w') as file:
+        json.dump(cluster, file)
+    processes = [subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve', config_path, peer_id,
+                                   '--executor', args.executor] + (['--pregenerate'] if args.pregenerate else []))
+                 for peer_id in cluster['nodes']]
+    try:
+        return trio.run(run_coordinator, cluster, parties, args)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+        os.remove(config_path)
+
+
+def serve(config_path: str, peer_id: str, args) -> None:
+    with open(config_path) as file:
+        cluster = json.load(file)
+    node = make_node(cluster, peer_id, args.executor, args.pregenerate)
+    try:
+        trio.run(node.run)
+    except KeyboardInterrupt:
+        pass
+
+
+def metadata(args) -> Dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'mode': args.mode,
+        'executor': args.executor,
+        'pregenerate': args.pregenerate,
+        'round1_bundle': not args.no_round1_bundle,
+        'binary_codec': args.binary_codec,
+    }
+
+
+def parse_party(value: str) -> Tuple[int, int]:
+    threshold, n = value.split(':')
+    return int(threshold), int(n)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='DKG, nonce generation and signing benchmarks on a loopback cluster')
+    parser.add_argument('--parties', nargs='+', type=parse_party, default=[(7, 10)],
+                        help='threshold:n pairs, e.g. 7:10 15:20 25:30')
+    parser.add_argument('--mode', choices=('inprocess', 'loopback', 'subprocess'), default='inprocess')
+    parser.add_argument('--executor', choices=EXECUTOR_MODES, default='thread')
+    parser.add_argument('--dkgs', type=int, default=3)
+    parser.add_argument('--nonce-requests', type=int, default=3)
+    parser.add_argument('--nonces', type=int, default=100)
+    parser.add_argument('--signs', type=int, default=20)
+    parser.add_argument('--pregenerate', action='store_true',
+                        help='let nodes pre-generate nonces in the background')
+    parser.add_argument('--no-round1-bundle', action='store_true',
+                        help='send the legacy per-node round-2 requests, for comparing DKG time')
+    parser.add_argument('--binary-codec', action='store_true',
+                        help='send with the binary codec instead of JSON')
+    parser.add_argument('--base-port', type=int, default=6000)
+    parser.add_argument('--timeout', type=int, default=200)
+    parser.add_argument('--startup-delay', type=float, default=2.0)
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--serve', nargs=2, metavar=('CONFIG', 'PEER_ID'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    sys.set_int_max_str_digits(0)
+    logging.basicConfig(level=logging.WARNING,
+                        format='%(asctime)s - %(message)s')
+
+    if args.serve is not None:
+        serve(args.serve[0], args.serve[1], args)
+        sys.exit(0)
+
+    parties = args.parties
+    cluster = make_cluster(max(n for _, n in parties), args.base_port)
+    if args.mode != 'subprocess':
+        results = trio.run(run_in_process, cluster, parties, args)
+        children_cpu = None
+    else:
+        results = run_subprocesses(cluster, parties, args,
+                                   f'cluster-{args.base_port}.json')
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        children_cpu = usage.ru_utime + usage.ru_stime
+
+    report = {
+        'metadata': metadata(args),
+        'results': results,
+        'children_cpu_seconds': children_cpu,
+    }
+    print(f'{"scenario":>8} | {"t of n":>8} | {"p50":>8} | {"p90":>8} | {"p99":>8} | '
+          f'{"ops/s":>7} | {"CPU s":>7} | {"SA crypto":>9} | {"node crypto":>11} | {"bytes":>11} | {"failed":>6}')
+    for result in results:
+        latency = result['latency']
+        node_crypto = result['node_crypto_cpu_seconds']
+        node_crypto = f'{node_crypto:>11.2f}' if node_crypto is not None else f'{"-":>11}'
+        print(f'{result["scenario"]:>8} | {result["threshold"]:>3} of {result["n"]:<2} | '
+              f'{latency.get("p50", 0):>8.3f} | {latency.get("p90", 0):>8.3f} | {latency.get("p99", 0):>8.3f} | '
+              f'{result["throughput_per_second"]:>7.2f} | {result["cpu_seconds"]:>7.2f} | '
+              f'{result["coordinator_crypto_cpu_seconds"]:>9.2f} | {node_crypto} | '
+              f'{result["bytes"]:>11} | {result["failures"]:>6}')
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
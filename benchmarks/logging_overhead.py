@@ -0,0 +1,80 @@
+from frost_mpc.common.codec import encode_message
+from frost_mpc.common.libp2p_protocols import BINARY_PROTOCOLS_ID
+from frost_mpc.common.payload_log import payload, set_payload_log_mode
+from frost_mpc.common.utils import RequestObject, Utils
+from round2_payload import synthetic_round1_response
+
+import logging
+import pprint
+import timeit
+import sys
+import os
+
+PEER_ID = '16Uiu2HAmGVUb3nZ3yaKNpt5kH7KZccKrPaHmG1qmFkCE2oxaSp9X'
+PROTOCOL_ID = BINARY_PROTOCOLS_ID['round2']
+
+
+def eager_logging(encoded_message: bytes, message: dict, response: dict, responses: dict) -> None:
+    # What one round2 request logged before: f-strings and pformat are built whatever the level
+    logging.debug(f'{PEER_ID}{PROTOCOL_ID} Sent message: {encoded_message}')
+    logging.debug(f'{PEER_ID}{PROTOCOL_ID} Got message: {message}')
+    logging.debug(f'{PEER_ID}{PROTOCOL_ID} Sent message: {response}')
+    logging.debug(f'{PEER_ID}{PROTOCOL_ID} Received response: {response}')
+    logging.debug(f'Round2 dictionary response: \n{pprint.pformat(responses)}')
+
+
+def lazy_logging(encoded_message: bytes, message: dict, response: dict, responses: dict) -> None:
+    logging.debug('%s%s Sent message: %s', PEER_ID,
+                  PROTOCOL_ID, payload(encoded_message))
+    logging.debug('%s%s Got message: %s', PEER_ID, PROTOCOL_ID, payload(message))
+    logging.debug('%s%s Sent message: %s', PEER_ID, PROTOCOL_ID, payload(response))
+    logging.debug('%s%s Received response: %s', PEER_ID,
+                  PROTOCOL_ID, payload(response))
+    logging.debug('Round2 dictionary response: \n%s',
+                  payload(responses, pretty=True))
+
+
+def measure(function, args, repeat: int = 5) -> float:
+    best = None
+    for _ in range(repeat):
+        start = timeit.default_timer()
+        function(*args)
+        elapsed = timeit.default_timer() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == '__main__':
+    sys.set_int_max_str_digits(0)
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 20, 30]
+    # A real handler, so enabled records are actually formatted
+    logging.getLogger().addHandler(logging.StreamHandler(open(os.devnull, 'w')))
+    print('Logging cost of one round2 request (seconds)')
+    print(f'{"n":>4} | {"eager, off":>11} | {"lazy, off":>11} | {"eager, on":>11} | '
+          f'{"truncate, on":>12} | {"hash, on":>11}')
+    for n in sizes:
+        threshold = n * 2 // 3 + 1
+        round1_response = synthetic_round1_response(n, threshold)
+        dkg_id = Utils.generate_random_uuid()
+        message = RequestObject(dkg_id, 'round2', {
+            'dkg_id': dkg_id,
+            'broadcasted_data': round1_response
+        }).get()
+        encoded_message = encode_message(message, PROTOCOL_ID)
+        response = {'broadcast': [data['broadcast'] for data in round1_response.values()],
+                    'status': 'SUCCESSFUL'}
+        responses = {peer_id: response for peer_id in round1_response}
+        args = (encoded_message, message, response, responses)
+
+        logging.getLogger().setLevel(logging.INFO)
+        eager_off = measure(eager_logging, args)
+        lazy_off = measure(lazy_logging, args)
+        logging.getLogger().setLevel(logging.DEBUG)
+        eager_on = measure(eager_logging, args)
+        set_payload_log_mode('truncate')
+        truncate_on = measure(lazy_logging, args)
+        set_payload_log_mode('hash')
+        hash_on = measure(lazy_logging, args)
+        set_payload_log_mode('full')
+        print(f'{n:>4} | {eager_off:>10.5f}s | {lazy_off:>10.7f}s | {eager_on:>10.5f}s | '
+              f'{truncate_on:>11.5f}s | {hash_on:>10.5f}s')
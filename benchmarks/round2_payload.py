@@ -0,0 +1,90 @@
+from frost_mpc.common.codec import encode_message, decode_message, CachedMessage
+from frost_mpc.common.libp2p_protocols import PROTOCOLS_ID, BINARY_PROTOCOLS_ID
+from frost_mpc.common.utils import Utils, RequestObject
+from typing import Dict
+
+import timeit
+import secrets
+import sys
+
+
+def random_point_code() -> int:
+    # Compressed secp256k1 points travel as integers with a 0x02/0x03 prefix byte
+    return (2 + secrets.randbelow(2)) * (1 << 256) + secrets.randbits(256)
+
+
+def synthetic_round1_response(n: int, threshold: int) -> Dict:
+    # Same shape and sizes as the round1 broadcast of a (threshold, n) DKG
+    response = {}
+    for staking_id in range(1, n + 1):
+        peer_id = Utils.generate_secret_and_peer_id()['peer_id']
+        response[peer_id] = {
+            'broadcast': {
+                'sender_id': str(staking_id),
+                'public_fx': [random_point_code() for _ in range(threshold)],
+                'coefficient0_signature': {
+                    'nonce': random_point_code(),
+                    'signature': secrets.randbits(256),
+                },
+                'public_nonce': random_point_code(),
+            },
+            'validation': secrets.token_bytes(71).hex(),
+            'status': 'SUCCESSFUL',
+        }
+    return response
+
+
+def measure(n: int, threshold: int, repeat: int = 3) -> Dict:
+    dkg_id = Utils.generate_random_uuid()
+    round1_response = synthetic_round1_response(n, threshold)
+    legacy = RequestObject(dkg_id, 'round2', {
+        'dkg_id': dkg_id,
+        'broadcasted_data': round1_response
+    }).get()
+    bundle = {peer_id: {'broadcast': data['broadcast'], 'validation': data['validation']}
+              for peer_id, data in round1_response.items()}
+    compact = RequestObject(dkg_id, 'round2', {
+        'dkg_id': dkg_id,
+        'bundle_digest': Utils.get_digest(bundle),
+        'bundle': bundle
+    }).get()
+
+    # Each step changes one thing, so the codec and the bundle are credited separately
+    variants = [
+        ('json', legacy, PROTOCOLS_ID['round2'], False),
+        ('binary', legacy, BINARY_PROTOCOLS_ID['round2'], False),
+        ('bundle', compact, BINARY_PROTOCOLS_ID['round2'], False),
+        ('cached', compact, BINARY_PROTOCOLS_ID['round2'], True),
+    ]
+    results = {}
+    for name, message, protocol_id, cache in variants:
+        best = None
+        for _ in range(repeat):
+            start = timeit.default_timer()
+            total_bytes = 0
+            # The bundle request is identical for every node, so Dkg encodes it once
+            cached = CachedMessage(message) if cache else None
+            # One request per party member, encoded by the coordinator and decoded by the node
+            for _ in range(n):
+                encoded = encode_message(cached or message, protocol_id)
+                decode_message(encoded, protocol_id)
+                total_bytes += len(encoded)
+            elapsed = timeit.default_timer() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = {'bytes': total_bytes, 'seconds': best}
+    return results
+
+
+if __name__ == '__main__':
+    sys.set_int_max_str_digits(0)
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 20, 30, 50]
+    print('Round2 requests for the whole party: bytes on the wire and serialization time (encode + decode)')
+    print(f'{"n":>4} | {"JSON bytes":>11} | {"binary bytes":>12} | {"bundle bytes":>12} | '
+          f'{"JSON time":>10} | {"binary time":>11} | {"bundle time":>11} | {"cached time":>11}')
+    for n in sizes:
+        threshold = n * 2 // 3 + 1
+        result = measure(n, threshold)
+        print(f'{n:>4} | {result["json"]["bytes"]:>11} | {result["binary"]["bytes"]:>12} | '
+              f'{result["bundle"]["bytes"]:>12} | {result["json"]["seconds"]:>9.4f}s | '
+              f'{result["binary"]["seconds"]:>10.4f}s | {result["bundle"]["seconds"]:>10.4f}s | '
+              f'{result["cached"]["seconds"]:>10.4f}s')
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 from typing import Dict, List
+from ..common.nonce_store import NonceStore
 
 
 class DataManager(ABC):
@@ -12,6 +13,50 @@ class DataManager(ABC):
 
         pass
 
+    def add_nonces(self, nonces: Dict[str, Dict], replace: bool = False, max_size: int = None) -> int:
+        # nonces maps the key of each public commitment to its private nonce.
+        # Appends by default; beyond max_size the oldest nonces are evicted and their count returned.
+        # The default goes through get_nonces/set_nonces, so older subclasses keep working;
+        # the commitment index lives in memory only, override for a persistent one
+        keys = self.__nonce_keys()
+        if replace:
+            keys.clear()
+        nonces_list = [] if replace else list(self.get_nonces())
+        for commitment_key, nonce in nonces.items():
+            keys[commitment_key] = NonceStore.get_key(nonce)
+            nonces_list.append(nonce)
+        evicted = 0
+        if max_size is not None and len(nonces_list) > max_size:
+            evicted = len(nonces_list) - max_size
+            nonces_list = nonces_list[evicted:]
+            remaining = {NonceStore.get_key(nonce) for nonce in nonces_list}
+            for commitment_key in [key for key, value in keys.items() if value not in remaining]:
+                del keys[commitment_key]
+        self.set_nonces(nonces_list)
+        return evicted
+
+    def pop_nonce(self, commitment_key: str) -> Dict:
+        # Must remove and return atomically, or return None if the nonce is unknown
+        nonce_key = self.__nonce_keys().pop(commitment_key, None)
+        if nonce_key is None:
+            return None
+        nonces_list = list(self.get_nonces())
+        for index, nonce in enumerate(nonces_list):
+            if NonceStore.get_key(nonce) == nonce_key:
+                del nonces_list[index]
+                self.set_nonces(nonces_list)
+                return nonce
+        return None
+
+    def get_nonces_count(self) -> int:
+        return len(self.get_nonces())
+
+    def __nonce_keys(self) -> Dict[str, str]:
+        # Subclasses need not call super().__init__(), so the index is created on first use
+        if '_DataManager__keys' not in self.__dict__:
+            self.__keys: Dict[str, str] = {}
+        return self.__keys
+
     @abstractmethod
     def set_dkg_key(self,  key, value) -> None:
         pass
@@ -0,0 +1,8 @@
+from abc import ABC, abstractmethod
+
+
+class MetricsSink(ABC):
+    @abstractmethod
+    def write(self, text: str) -> None:
+        # text is a full snapshot in the Prometheus text exposition format
+        pass
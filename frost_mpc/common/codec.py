@@ -0,0 +1,369 @@
+from libp2p.typing import TProtocol
+from .libp2p_protocols import TO_JSON_PROTOCOL
+
+from typing import Any, Callable, Dict, Iterator, Tuple
+
+import json
+import struct
+
+CODEC_VERSION = 1
+FRAMED_VERSION = 2
+FRAME_CHUNK_SIZE = 1 << 16
+
+TAG_NONE = 0x00
+TAG_FALSE = 0x01
+TAG_TRUE = 0x02
+TAG_INT = 0x03
+TAG_SCALAR = 0x04
+TAG_POINT = 0x05
+TAG_BIG_INT = 0x06
+TAG_STR = 0x07
+TAG_HEX_STR = 0x08
+TAG_BYTES = 0x09
+TAG_LIST = 0x0a
+TAG_DICT = 0x0b
+TAG_FLOAT = 0x0c
+
+SCALAR_SIZE = 32
+POINT_SIZE = 33
+SMALL_INT_LIMIT = 1 << 63
+# Protocol messages nest a few levels; deeper input is rejected before it exhausts the stack
+MAX_DEPTH = 64
+
+
+class CodecError(ValueError):
+    pass
+
+
+def _write_varint(buffer: bytearray, value: int) -> None:
+    while value >= 0x80:
+        buffer.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _is_hex_str(value: str) -> bool:
+    if len(value) == 0 or len(value) % 2 != 0:
+        return False
+    try:
+        return bytes.fromhex(value).hex() == value
+    except ValueError:
+        return False
+
+
+def _dict_key(key: Any) -> str:
+    # Mirror json.dumps, which turns every dict key into a string
+    if isinstance(key, str):
+        return key
+    if key is True:
+        return 'true'
+    if key is False:
+        return 'false'
+    if key is None:
+        return 'null'
+    if isinstance(key, (int, float)):
+        return json.dumps(key)
+    raise CodecError(f'Keys must be str, int, float, bool or None, not {type(key).__name__}')
+
+
+def _encode_int(buffer: bytearray, value: int) -> None:
+    if -SMALL_INT_LIMIT <= value < SMALL_INT_LIMIT:
+        buffer.append(TAG_INT)
+        _write_varint(buffer, (value << 1) ^ (value >> 63))
+    elif 0 <= value < 1 << (8 * SCALAR_SIZE):
+        buffer.append(TAG_SCALAR)
+        buffer += value.to_bytes(SCALAR_SIZE, 'big')
+    elif (value >> (8 * SCALAR_SIZE)) in (2, 3):
+        # Compressed secp256k1 point codes (0x02/0x03 prefix + x coordinate)
+        buffer.append(TAG_POINT)
+        buffer += value.to_bytes(POINT_SIZE, 'big')
+    else:
+        buffer.append(TAG_BIG_INT)
+        buffer.append(1 if value < 0 else 0)
+        magnitude = abs(value)
+        data = magnitude.to_bytes((magnitude.bit_length() + 7) // 8, 'big')
+        _write_varint(buffer, len(data))
+        buffer += data
+
+
+def _encode_str(buffer: bytearray, value: str) -> None:
+    if _is_hex_str(value):
+        data = bytes.fromhex(value)
+        buffer.append(TAG_HEX_STR)
+    else:
+        data = value.encode('utf-8')
+        buffer.append(TAG_STR)
+    _write_varint(buffer, len(data))
+    buffer += data
+
+
+def _encode(buffer: bytearray, value: Any) -> None:
+    value_type = type(value)
+    if value_type is dict:
+        buffer.append(TAG_DICT)
+        _write_varint(buffer, len(value))
+        for key, item in value.items():
+            data = (key if type(key) is str else _dict_key(key)).encode('utf-8')
+            _write_varint(buffer, len(data))
+            buffer += data
+            _encode(buffer, item)
+    elif value_type is int:
+        _encode_int(buffer, value)
+    elif value_type is str:
+        _encode_str(buffer, value)
+    elif value_type is list or value_type is tuple:
+        buffer.append(TAG_LIST)
+        _write_varint(buffer, len(value))
+        for item in value:
+            _encode(buffer, item)
+    elif value is None:
+        buffer.append(TAG_NONE)
+    elif value is True:
+        buffer.append(TAG_TRUE)
+    elif value is False:
+        buffer.append(TAG_FALSE)
+    elif isinstance(value, float):
+        buffer.append(TAG_FLOAT)
+        buffer += struct.pack('>d', value)
+    elif isinstance(value, (bytes, bytearray)):
+        buffer.append(TAG_BYTES)
+        _write_varint(buffer, len(value))
+        buffer += value
+    elif isinstance(value, int):
+        _encode_int(buffer, int(value))
+    elif isinstance(value, str):
+        _encode_str(buffer, str(value))
+    elif isinstance(value, dict):
+        _encode(buffer, dict(value))
+    elif isinstance(value, (list, tuple)):
+        _encode(buffer, list(value))
+    else:
+        raise CodecError(
+            f'Object of type {type(value).__name__} is not serializable')
+
+
+def _read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    result = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, offset
+        shift += 7
+
+
+def _decode(data: bytes, offset: int, depth: int = 0) -> Tuple[Any, int]:
+    # Returns the decoded value and the offset right after it
+    if depth > MAX_DEPTH:
+        raise CodecError(f'Nesting deeper than {MAX_DEPTH} levels')
+    tag = data[offset]
+    offset += 1
+    if tag == TAG_POINT:
+        end = offset + POINT_SIZE
+        return int.from_bytes(data[offset:end], 'big'), end
+    if tag == TAG_SCALAR:
+        end = offset + SCALAR_SIZE
+        return int.from_bytes(data[offset:end], 'big'), end
+    if tag == TAG_DICT:
+        count, offset = _read_varint(data, offset)
+        result = {}
+        for _ in range(count):
+            size, offset = _read_varint(data, offset)
+            end = offset + size
+            key = data[offset:end].decode('utf-8')
+            result[key], offset = _decode(data, end, depth + 1)
+        return result, offset
+    if tag == TAG_STR or tag == TAG_HEX_STR or tag == TAG_BYTES:
+        size, offset = _read_varint(data, offset)
+        end = offset + size
+        chunk = data[offset:end]
+        if tag == TAG_STR:
+            return chunk.decode('utf-8'), end
+        if tag == TAG_HEX_STR:
+            return chunk.hex(), end
+        return chunk, end
+    if tag == TAG_INT:
+        value, offset = _read_varint(data, offset)
+        return (value >> 1) ^ -(value & 1), offset
+    if tag == TAG_LIST:
+        count, offset = _read_varint(data, offset)
+        result = []
+        for _ in range(count):
+            item, offset = _decode(data, offset, depth + 1)
+            result.append(item)
+        return result, offset
+    if tag == TAG_NONE:
+        return None, offset
+    if tag == TAG_TRUE:
+        return True, offset
+    if tag == TAG_FALSE:
+        return False, offset
+    if tag == TAG_BIG_INT:
+        negative = data[offset]
+        size, offset = _read_varint(data, offset + 1)
+        end = offset + size
+        value = int.from_bytes(data[offset:end], 'big')
+        return -value if negative else value, end
+    if tag == TAG_FLOAT:
+        end = offset + 8
+        return struct.unpack('>d', data[offset:end])[0], end
+    raise CodecError(f'Unknown tag: {tag}')
+
+
+def encode(value: Any) -> bytes:
+    buffer = bytearray([CODEC_VERSION])
+    _encode(buffer, value)
+    return bytes(buffer)
+
+
+def decode(data: bytes) -> Any:
+    if len(data) == 0:
+        raise CodecError('Empty data')
+    if data[0] != CODEC_VERSION:
+        raise CodecError(f'Unsupported codec version: {data[0]}')
+    data = bytes(data)
+    try:
+        value, offset = _decode(data, 1)
+    except (IndexError, struct.error, UnicodeDecodeError):
+        raise CodecError('Malformed data')
+    # Slicing never raises, so a truncated payload is caught by the final offset
+    if offset != len(data):
+        raise CodecError('Truncated or trailing data')
+    return value
+
+
+def encode_frame(value: Any) -> bytes:
+    buffer = bytearray()
+    _encode(buffer, value)
+    frame = bytearray()
+    _write_varint(frame, len(buffer))
+    return bytes(frame + buffer)
+
+
+def encode_framed(message: Dict, stream_key: str = None) -> Iterator[bytes]:
+    # A header frame [stream_key, is_dict, message without stream_key], then one frame
+    # per item of message[stream_key] and an empty frame marking the end
+    items = message.get(stream_key) if stream_key is not None else None
+    if not isinstance(items, (list, dict)):
+        stream_key = None
+    header = {key: value for key, value in message.items()
+              if key != stream_key}
+    yield bytes([FRAMED_VERSION]) + encode_frame([stream_key, isinstance(items, dict), header])
+    if stream_key is not None:
+        if isinstance(items, dict):
+            for key, item in items.items():
+                yield encode_frame([_dict_key(key), item])
+        else:
+            for item in items:
+                yield encode_frame(item)
+    yield bytes([0])
+
+
+class FramedDecoder:
+    # Incremental decoder for encode_framed output. Streamed items are passed to
+    # on_item as they arrive instead of being collected into the message
+    def __init__(self, on_item: Callable[[Any], None] = None) -> None:
+        self.on_item = on_item
+        self.message: Dict = None
+        self.done: bool = False
+        self.__buffer = bytearray()
+        self.__started = False
+        self.__stream_key: str = None
+        self.__items = None
+
+    def feed(self, data: bytes) -> None:
+        if self.done:
+            if len(data) > 0:
+                raise CodecError('Trailing data')
+            return
+        self.__buffer += data
+        offset = 0
+        if not self.__started:
+            if len(self.__buffer) == 0:
+                return
+            if self.__buffer[0] != FRAMED_VERSION:
+                raise CodecError(
+                    f'Unsupported framing version: {self.__buffer[0]}')
+            self.__started = True
+            offset = 1
+        try:
+            while True:
+                try:
+                    size, start = _read_varint(self.__buffer, offset)
+                except IndexError:
+                    break
+                if size == 0:
+                    self.__finish()
+                    offset = start
+                    break
+                end = start + size
+                if end > len(self.__buffer):
+                    break
+                value, position = _decode(bytes(self.__buffer[start:end]), 0)
+                if position != size:
+                    raise CodecError('Frame size mismatch')
+                self.__handle_frame(value)
+                offset = end
+        except CodecError:
+            raise
+        except (IndexError, struct.error, UnicodeDecodeError, TypeError, ValueError):
+            raise CodecError('Malformed frame')
+        del self.__buffer[:offset]
+        if self.done and len(self.__buffer) > 0:
+            raise CodecError('Trailing data')
+
+    def __handle_frame(self, value: Any) -> None:
+        if self.message is None:
+            self.__stream_key, is_dict, self.message = value
+            if self.__stream_key is not None and self.on_item is None:
+                self.__items = {} if is_dict else []
+            return
+        if self.__stream_key is None:
+            raise CodecError('Unexpected frame')
+        if self.on_item is not None:
+            self.on_item(value)
+        elif isinstance(self.__items, dict):
+            key, item = value
+            self.__items[key] = item
+        else:
+            self.__items.append(value)
+
+    def __finish(self) -> None:
+        if self.message is None:
+            raise CodecError('Missing header frame')
+        if self.__items is not None:
+            self.message[self.__stream_key] = self.__items
+        self.done = True
+
+
+def is_binary_protocol(protocol_id: TProtocol) -> bool:
+    return protocol_id in TO_JSON_PROTOCOL
+
+
+class CachedMessage:
+    # Wraps a message sent unchanged to many peers so it is encoded once per wire format
+    def __init__(self, message: Dict) -> None:
+        self.message: Dict = message
+        self.__encoded: Dict[bool, bytes] = {}
+
+    def encode(self, protocol_id: TProtocol) -> bytes:
+        key = is_binary_protocol(protocol_id)
+        if key not in self.__encoded:
+            self.__encoded[key] = encode_message(self.message, protocol_id)
+        return self.__encoded[key]
+
+
+def encode_message(message: Dict, protocol_id: TProtocol) -> bytes:
+    if isinstance(message, CachedMessage):
+        return message.encode(protocol_id)
+    if is_binary_protocol(protocol_id):
+        return encode(message)
+    return json.dumps(message).encode('utf-8')
+
+
+def decode_message(data: bytes, protocol_id: TProtocol) -> Dict:
+    if is_binary_protocol(protocol_id):
+        return decode(data)
+    return json.loads(data.decode('utf-8'))
@@ -0,0 +1,147 @@
+from collections import deque
+from typing import Deque, Dict, List, Set
+
+import logging
+import trio
+
+
+class CommitmentManager:
+    # Per-peer queues of public nonce commitments, topped up concurrently through the SA
+    def __init__(self, sa, min_commitments: int = 10, batch_size: int = 100) -> None:
+        self.sa = sa
+        self.min_commitments: int = min_commitments
+        self.batch_size: int = batch_size
+        self.__commitments: Dict[str, Deque[Dict]] = {}
+        # Last pool statistics each node reported with its nonces
+        self.pool_stats: Dict[str, Dict] = {}
+        # Set once the refill in flight for a peer has finished, however it ended
+        self.__refilling: Dict[str, trio.Event] = {}
+        self.__pending: Set[str] = set()
+        self.__refill_needed = trio.Event()
+        self.__arrived = trio.Event()
+        self.__is_running = False
+
+    def count(self, peer_id: str) -> int:
+        return len(self.__commitments.get(peer_id, ()))
+
+    def add(self, peer_id: str, commitments: List[Dict], pool: Dict = None) -> None:
+        queue = self.__commitments.setdefault(peer_id, deque())
+        queue.extend(commitments)
+        if pool is not None:
+            self.pool_stats[peer_id] = pool
+            # The node keeps at most pool['size'] nonces and evicts its oldest first, so
+            # commitments beyond that are for nonces it no longer has
+            stale = len(queue) - pool['size']
+            for _ in range(max(stale, 0)):
+                queue.popleft()
+            if stale > 0:
+                logging.warning(
+                    f'{peer_id} Commitment manager => Dropped {stale} commitments the node evicted')
+        self.__arrived.set()
+        self.__arrived = trio.Event()
+
+    def shortfall(self, peer_id: str) -> int:
+        # Nonces needed to bring the queue up to batch_size, without asking a node
+        # for more than its pool holds, since those would only evict others
+        target = self.batch_size
+        max_size = self.pool_stats.get(peer_id, {}).get('max_size')
+        if max_size is not None:
+            target = min(target, max_size)
+        return target - self.count(peer_id)
+
+    async def refill(self, peer_ids: List[str], number_of_nonces: int = None) -> None:
+        # Peers that already have a request in flight are skipped. Without number_of_nonces,
+        # each peer is asked only for its shortfall
+        peer_ids = [
+            peer_id for peer_id in peer_ids if peer_id not in self.__refilling]
+        groups: Dict[int, List[str]] = {}
+        for peer_id in peer_ids:
+            number = number_of_nonces or self.shortfall(peer_id)
+            if number > 0:
+                groups.setdefault(number, []).append(peer_id)
+        peer_ids = [peer_id for group in groups.values() for peer_id in group]
+        if len(peer_ids) == 0:
+            return
+        for peer_id in peer_ids:
+            self.__refilling[peer_id] = trio.Event()
+        response = {}
+
+        async def request_group(number: int, group: List[str]) -> None:
+            response.update(await self.sa.request_nonces(group, number))
+        try:
+            async with trio.open_nursery() as nursery:
+                for number, group in groups.items():
+                    nursery.start_soon(request_group, number, group)
+        finally:
+            for peer_id in peer_ids:
+                self.__refilling.pop(peer_id).set()
+        for peer_id in peer_ids:
+            data = response.get(peer_id, {})
+            if data.get('status') == 'SUCCESSFUL':
+                self.add(peer_id, data['nonces'], data.get('pool'))
+            else:
+                logging.error(
+                    f'{peer_id} Commitment manager => Refill failed: {data}')
+
+    def request_refill(self, peer_ids: List[str]) -> None:
+        self.__pending.update(peer_ids)
+        self.__refill_needed.set()
+
+    async def run(self) -> None:
+        # Background refills requested by take(); without it, take() refills inline
+        self.__is_running = True
+        try:
+            async with trio.open_nursery() as nursery:
+                while True:
+                    await self.__refill_needed.wait()
+                    self.__refill_needed = trio.Event()
+                    peer_ids = list(self.__pending)
+                    self.__pending.clear()
+                    nursery.start_soon(self.refill, peer_ids)
+        finally:
+            self.__is_running = False
+
+    async def take(self, party: List[str], timeout: float = 5) -> Dict[str, Dict]:
+        # One commitment per signer, keyed by staking id as request_signature expects
+        with trio.move_on_after(timeout):
+            while True:
+                missing = [peer_id for peer_id in party if self.count(peer_id) == 0]
+                if len(missing) == 0:
+                    break
+                if self.__is_running:
+                    arrived = self.__arrived
+                    self.request_refill(missing)
+                    await arrived.wait()
+                else:
+                    # Peers with a refill already in flight are waited for, the others refilled here
+                    in_flight = [self.__refilling[peer_id]
+                                 for peer_id in missing if peer_id in self.__refilling]
+                    await self.refill(missing)
+                    for refilled in in_flight:
+                        await refilled.wait()
+                    if len(in_flight) == 0 and any(self.count(peer_id) == 0 for peer_id in missing):
+                        # Our own refill came back short; retrying right away would only spin
+                        break
+
+        commitments_dict = {}
+        peer_ids_with_timeout = {}
+        for peer_id in party:
+            if self.count(peer_id) == 0:
+                peer_ids_with_timeout[peer_id] = {
+                    'status': 'TIMEOUT',
+                    'error': 'Communication timed out',
+                }
+                continue
+            commitment = self.__commitments[peer_id].popleft()
+            commitments_dict[str(self.sa.node_info.lookup_node(
+                peer_id)['staking_id'])] = commitment
+
+        if len(peer_ids_with_timeout) > 0:
+            logging.error(
+                f'Commitment manager => Timeout error occurred. peer ids with timeout: {peer_ids_with_timeout}')
+
+        low = [peer_id for peer_id in party if self.count(
+            peer_id) < self.min_commitments]
+        if len(low) > 0 and self.__is_running:
+            self.request_refill(low)
+        return commitments_dict
@@ -0,0 +1,102 @@
+from libp2p.host.host_interface import IHost
+from libp2p.peer.id import ID as PeerID
+from libp2p.peer.peerinfo import PeerInfo, info_from_p2p_addr
+
+from contextlib import asynccontextmanager
+from typing import Dict
+
+import timeit
+import logging
+import trio
+import multiaddr
+
+
+class PooledConnection:
+    def __init__(self, peer_info: PeerInfo) -> None:
+        self.peer_info: PeerInfo = peer_info
+        self.lock = trio.Lock()
+        self.active_streams: int = 0
+        self.last_used: float = timeit.default_timer()
+
+
+class ConnectionPool:
+    def __init__(self, host: IHost, max_idle_time: float = 300.0) -> None:
+        self.host: IHost = host
+        self.max_idle_time: float = max_idle_time
+        self.__connections: Dict[str, PooledConnection] = {}
+
+    def __get_entry(self, destination_address: Dict[str, str], destination_peer_id: str) -> PooledConnection:
+        entry = self.__connections.get(str(destination_peer_id))
+        if entry is None:
+            destination = f'/ip4/{destination_address["ip"]}/tcp/{destination_address["port"]}/p2p/{destination_peer_id}'
+            entry = PooledConnection(
+                info_from_p2p_addr(multiaddr.Multiaddr(destination)))
+            self.__connections[str(destination_peer_id)] = entry
+        return entry
+
+    def is_alive(self, peer_id: PeerID) -> bool:
+        connection = self.host.get_network().connections.get(peer_id)
+        if connection is None:
+            return False
+        return not (connection.is_closed or connection.muxed_conn.is_closed)
+
+    async def __connect(self, entry: PooledConnection) -> None:
+        # The lock makes concurrent requests to the same peer share one dial
+        async with entry.lock:
+            if not self.is_alive(entry.peer_info.peer_id):
+                await self.host.connect(entry.peer_info)
+                logging.debug(
+                    f'{entry.peer_info.peer_id} Connection pool => Dialed a new connection.')
+        entry.last_used = timeit.default_timer()
+
+    async def get_connection(self, destination_address: Dict[str, str], destination_peer_id: str) -> PeerInfo:
+        entry = self.__get_entry(destination_address, destination_peer_id)
+        await self.__connect(entry)
+        return entry.peer_info
+
+    @asynccontextmanager
+    async def connection(self, destination_address: Dict[str, str], destination_peer_id: str):
+        entry = self.__get_entry(destination_address, destination_peer_id)
+        entry.active_streams += 1
+        try:
+            await self.__connect(entry)
+            yield entry.peer_info
+        finally:
+            entry.active_streams -= 1
+            entry.last_used = timeit.default_timer()
+
+    async def invalidate(self, destination_peer_id: str) -> None:
+        entry = self.__connections.pop(str(destination_peer_id), None)
+        if entry is None:
+            return
+        try:
+            await self.host.disconnect(entry.peer_info.peer_id)
+        except Exception as e:
+            logging.debug(
+                f'{destination_peer_id} Connection pool => Exception occurred while disconnecting: {type(e).__name__}: {e}')
+
+    async def invalidate_if_dead(self, destination_peer_id: str) -> None:
+        # A failed stream says nothing about the connection other streams may still be using
+        entry = self.__connections.get(str(destination_peer_id))
+        if entry is None or entry.active_streams > 0 or self.is_alive(entry.peer_info.peer_id):
+            return
+        await self.invalidate(destination_peer_id)
+
+    async def evict_idle(self) -> None:
+        now = timeit.default_timer()
+        for peer_id, entry in list(self.__connections.items()):
+            if entry.active_streams > 0:
+                continue
+            if not self.is_alive(entry.peer_info.peer_id):
+                del self.__connections[peer_id]
+            elif now - entry.last_used > self.max_idle_time:
+                logging.debug(
+                    f'{peer_id} Connection pool => Evicting idle connection.')
+                await self.invalidate(peer_id)
+
+    async def close(self) -> None:
+        for peer_id in list(self.__connections.keys()):
+            await self.invalidate(peer_id)
+
+    def __len__(self) -> int:
+        return len(self.__connections)
@@ -0,0 +1,70 @@
+from .metrics import CRYPTO_SECONDS
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Tuple
+
+import functools
+import threading
+import trio
+import time
+import os
+
+EXECUTOR_MODES = ('inline', 'thread', 'process')
+
+
+def _operation_name(function: Callable) -> str:
+    return getattr(function, '__name__', type(function).__name__)
+
+
+def _timed(function: Callable, *args) -> Tuple[Any, float]:
+    # Module level so it pickles for process mode; the CPU time is the worker thread's own
+    start = time.thread_time()
+    result = function(*args)
+    return result, time.thread_time() - start
+
+
+class CryptoExecutor:
+    def __init__(self, mode: str = 'thread', max_workers: int = None) -> None:
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(
+                f'Executor mode must be one of {EXECUTOR_MODES}, not {mode}')
+        self.mode: str = mode
+        self.max_workers: int = max_workers or os.cpu_count() or 1
+        self.limiter = trio.CapacityLimiter(self.max_workers)
+        # CPU time of the work run here, so roles sharing a process can be told apart
+        self.cpu_seconds: float = 0.0
+        self.__cpu_lock = threading.Lock()
+        self.__process_pool: ProcessPoolExecutor = None
+        if mode == 'process':
+            self.__process_pool = ProcessPoolExecutor(self.max_workers)
+
+    async def run(self, function: Callable, *args) -> Any:
+        # For pure functions: arguments and results must be picklable in process mode
+        with CRYPTO_SECONDS.time(operation=_operation_name(function)):
+            if self.mode == 'process':
+                future = self.__process_pool.submit(_timed, function, *args)
+                result, cpu_seconds = await trio.to_thread.run_sync(future.result, limiter=self.limiter)
+                self.__add_cpu(cpu_seconds)
+                return result
+            return await self.__run_in_thread(function, *args)
+
+    async def run_in_thread(self, function: Callable, *args) -> Any:
+        # For calls that mutate their object (e.g. DistributedKey methods) or use unpicklable state
+        with CRYPTO_SECONDS.time(operation=_operation_name(function)):
+            return await self.__run_in_thread(function, *args)
+
+    async def __run_in_thread(self, function: Callable, *args) -> Any:
+        if self.mode == 'inline':
+            result, cpu_seconds = _timed(function, *args)
+        else:
+            result, cpu_seconds = await trio.to_thread.run_sync(
+                functools.partial(_timed, function, *args), limiter=self.limiter)
+        self.__add_cpu(cpu_seconds)
+        return result
+
+    def __add_cpu(self, cpu_seconds: float) -> None:
+        with self.__cpu_lock:
+            self.cpu_seconds += cpu_seconds
+
+    def shutdown(self) -> None:
+        if self.__process_pool is not None:
+            self.__process_pool.shutdown()
@@ -0,0 +1,75 @@
+from .pyfrost.distributed_key import DistributedKey
+
+from collections import OrderedDict
+from typing import Dict, Set
+
+
+class DistributedKeyCache:
+    # Bounded LRU of live DistributedKey objects; evicted keys are rebuilt from the DataManager.
+    # Keys of running DKGs cannot be rebuilt, so they are pinned and never evicted
+    def __init__(self, max_size: int = 1000) -> None:
+        if max_size < 1:
+            raise ValueError('max_size must be at least 1')
+        self.max_size: int = max_size
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.__keys: 'OrderedDict[str, DistributedKey]' = OrderedDict()
+        self.__pinned: Set[str] = set()
+
+    def get(self, dkg_id: str) -> DistributedKey:
+        # Lookups through get() are the ones counted as hits and misses
+        distributed_key = self.__keys.get(dkg_id)
+        if distributed_key is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.__keys.move_to_end(dkg_id)
+        return distributed_key
+
+    def pin(self, dkg_id: str) -> None:
+        self.__pinned.add(dkg_id)
+
+    def unpin(self, dkg_id: str) -> None:
+        self.__pinned.discard(dkg_id)
+
+    def shrink(self, size: int) -> int:
+        # Drops least recently used unpinned keys, e.g. when the host runs low on memory.
+        # Pinned keys stay even if that leaves more than size keys
+        evictable = [dkg_id for dkg_id in self.__keys if dkg_id not in self.__pinned]
+        excess = len(self.__keys) - max(size, 0)
+        for dkg_id in evictable[:max(excess, 0)]:
+            del self.__keys[dkg_id]
+        evicted = min(max(excess, 0), len(evictable))
+        self.evictions += evicted
+        return evicted
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'size': len(self.__keys),
+            'pinned': len(self.__pinned),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+    def __getitem__(self, dkg_id: str) -> DistributedKey:
+        distributed_key = self.__keys[dkg_id]
+        self.__keys.move_to_end(dkg_id)
+        return distributed_key
+
+    def __setitem__(self, dkg_id: str, distributed_key: DistributedKey) -> None:
+        self.__keys[dkg_id] = distributed_key
+        self.__keys.move_to_end(dkg_id)
+        self.shrink(self.max_size)
+
+    def __delitem__(self, dkg_id: str) -> None:
+        del self.__keys[dkg_id]
+        self.__pinned.discard(dkg_id)
+
+    def __contains__(self, dkg_id: str) -> bool:
+        return dkg_id in self.__keys
+
+    def __len__(self) -> int:
+        return len(self.__keys)
@@ -2,7 +2,6 @@
 import timeit
 from libp2p.typing import TProtocol
 import libp2p.crypto.ed25519 as ed25519
-from libp2p.peer.peerinfo import info_from_p2p_addr
 from libp2p.crypto.secp256k1 import create_new_key_pair
 from libp2p.host.basic_host import BasicHost
 from libp2p.network.swarm import Swarm
@@ -14,18 +13,28 @@ from libp2p.stream_muxer.mplex.mplex import MPLEX_PROTOCOL_ID, Mplex
 from libp2p.transport.tcp.tcp import TCP
 from libp2p.transport.upgrader import TransportUpgrader
 from libp2p.host.host_interface import IHost
+from libp2p.network.stream.net_stream_interface import INetStream
+from libp2p.network.stream.exceptions import StreamEOF
+from .connection_pool import ConnectionPool
+from .payload_log import payload
+from .metrics import REGISTRY, REQUEST_SECONDS, BYTES_SENT, BYTES_RECEIVED, RESPONSES, TIMEOUTS
+from ..abstract.metrics_sink import MetricsSink
+from .libp2p_protocols import TO_BINARY_PROTOCOL
+from .codec import encode_message, decode_message, encode_framed, is_binary_protocol
+from .codec import CachedMessage, FramedDecoder, CodecError, FRAMED_VERSION, FRAME_CHUNK_SIZE
 
-from typing import Dict
+from typing import Any, Callable, Dict, List, Union
 import types
 import logging
 import trio
 import multiaddr
-import json
 
 
 class Libp2pBase:
 
-    def __init__(self, address: Dict[str, str], secret: str, host: IHost = None) -> None:
+    def __init__(self, address: Dict[str, str], secret: str, host: IHost = None,
+                 connection_pool: ConnectionPool = None, binary_codec: bool = False,
+                 metrics_sink: MetricsSink = None) -> None:
 
         # TODO: check this procedure to create host
         self._key_pair = create_new_key_pair(bytes.fromhex(secret))
@@ -49,6 +58,23 @@ class Libp2pBase:
 
             self.host: IHost = BasicHost(swarm)
 
+        # Hosts can be shared (e.g. by Dkg and SA), so the pool can be shared too
+        if connection_pool is not None:
+            self.connection_pool = connection_pool
+        else:
+            self.connection_pool = ConnectionPool(self.host)
+
+        # Opt-in: the pure-Python binary codec is smaller on the wire but still slower than
+        # json, so JSON stays the default. Nodes accept both either way
+        self.binary_codec: bool = binary_codec
+
+        # The registry is process wide; the sink, if any, gets a snapshot every metrics_interval seconds
+        self.metrics_sink: MetricsSink = metrics_sink
+        self.metrics_interval: float = 10.0
+        # Also kept per instance, since roles sharing a process also share the registry
+        self.bytes_sent: int = 0
+        self.bytes_received: int = 0
+
         self.ip: str = address['ip']
         self.port: str = address['port']
 
@@ -67,66 +93,148 @@ class Libp2pBase:
         listen_addr = multiaddr.Multiaddr(f'/ip4/{self.ip}/tcp/{self.port}')
         async with self.host.run(listen_addrs=[listen_addr]):
             for protocol_name, handler in self.protocol_handler.items():
-                self.host.set_stream_handler(
-                    self.protocol_list[protocol_name], handler)
+                protocol_id = self.protocol_list[protocol_name]
+                self.host.set_stream_handler(protocol_id, handler)
+                if protocol_id in TO_BINARY_PROTOCOL:
+                    self.host.set_stream_handler(
+                        TO_BINARY_PROTOCOL[protocol_id], handler)
             logging.info(
                 f'API: /ip4/{self.ip}/tcp/{self.port}/p2p/{self.host.get_id().pretty()}')
             logging.info('Waiting for incoming connections...')
+            last_export = timeit.default_timer()
             while self.__is_running:
                 await trio.sleep(1)
+                await self.connection_pool.evict_idle()
+                if self.metrics_sink is not None and \
+                        timeit.default_timer() - last_export >= self.metrics_interval:
+                    self.export_metrics()
+                    last_export = timeit.default_timer()
+            if self.metrics_sink is not None:
+                self.export_metrics()
 
     def stop(self) -> None:
 
         self.__is_running = False
 
+    def export_metrics(self) -> None:
+        try:
+            REGISTRY.export(self.metrics_sink)
+        except Exception as e:
+            logging.error(
+                f'Metrics export => Exception occurred: {type(e).__name__}: {e}')
+
+    def protocol_candidates(self, protocol_id: TProtocol) -> List[TProtocol]:
+        if self.binary_codec and protocol_id in TO_BINARY_PROTOCOL:
+            return [TO_BINARY_PROTOCOL[protocol_id], protocol_id]
+        return [protocol_id]
+
+    async def read_message(self, stream: INetStream, on_item: Callable[[Any], None] = None) -> Dict:
+        # Framed binary messages are decoded chunk by chunk; on_item receives streamed items
+        protocol_id = stream.get_protocol()
+        if not is_binary_protocol(protocol_id):
+            data = await stream.read()
+            BYTES_RECEIVED.inc(len(data), protocol=protocol_id)
+            self.bytes_received += len(data)
+            return decode_message(data, protocol_id)
+        try:
+            chunk = await stream.read(FRAME_CHUNK_SIZE)
+        except StreamEOF:
+            chunk = b''
+        if len(chunk) == 0 or chunk[0] != FRAMED_VERSION:
+            # Single document, e.g. a request encoded once with CachedMessage
+            data = chunk + await stream.read()
+            BYTES_RECEIVED.inc(len(data), protocol=protocol_id)
+            self.bytes_received += len(data)
+            return decode_message(data, protocol_id)
+        decoder = FramedDecoder(on_item)
+        decoder.feed(chunk)
+        size = len(chunk)
+        while not decoder.done:
+            try:
+                chunk = await stream.read(FRAME_CHUNK_SIZE)
+            except StreamEOF:
+                raise CodecError('Truncated framed message')
+            decoder.feed(chunk)
+            size += len(chunk)
+        BYTES_RECEIVED.inc(size, protocol=protocol_id)
+        self.bytes_received += size
+        return decoder.message
+
+    async def write_message(self, stream: INetStream, data: Dict, stream_key: str = None) -> None:
+        # data[stream_key] is sent item by item so the reader can start on it early
+        protocol_id = stream.get_protocol()
+        if not is_binary_protocol(protocol_id):
+            encoded_message = encode_message(data, protocol_id)
+            BYTES_SENT.inc(len(encoded_message), protocol=protocol_id)
+            self.bytes_sent += len(encoded_message)
+            await stream.write(encoded_message)
+            return
+        buffer = bytearray()
+        for frame in encode_framed(data, stream_key):
+            buffer += frame
+            if len(buffer) >= FRAME_CHUNK_SIZE:
+                BYTES_SENT.inc(len(buffer), protocol=protocol_id)
+                self.bytes_sent += len(buffer)
+                await stream.write(bytes(buffer))
+                buffer = bytearray()
+        if len(buffer) > 0:
+            BYTES_SENT.inc(len(buffer), protocol=protocol_id)
+            self.bytes_sent += len(buffer)
+            await stream.write(bytes(buffer))
+
     async def send(self, destination_address: Dict[str, str], destination_peer_id: PeerID, protocol_id: TProtocol,
-                   message: Dict, result: Dict = None, timeout: float = 5.0, semaphore: trio.Semaphore = None) -> None:
+                   message: Union[Dict, CachedMessage], result: Dict = None, timeout: float = 5.0, semaphore: trio.Semaphore = None,
+                   on_item: Callable[[Any], None] = None) -> None:
         if semaphore is not None:
             async with semaphore:
                 await self.__send(destination_address, destination_peer_id, protocol_id,
-                                  message, result, timeout)
+                                  message, result, timeout, on_item)
         else:
             await self.__send(destination_address, destination_peer_id, protocol_id,
-                              message, result, timeout)
+                              message, result, timeout, on_item)
 
     async def __send(self, destination_address: Dict[str, str], destination_peer_id: PeerID, protocol_id: TProtocol,
-                     message: Dict, result: Dict = None, timeout: float = 5.0) -> None:
+                     message: Union[Dict, CachedMessage], result: Dict = None, timeout: float = 5.0,
+                     on_item: Callable[[Any], None] = None) -> None:
 
         now = timeit.default_timer()
-        destination = f'/ip4/{destination_address["ip"]}/tcp/{destination_address["port"]}/p2p/{destination_peer_id}'
-        logging.info(
-            f'{destination_peer_id}{protocol_id} destination: {destination}')
-        maddr = multiaddr.Multiaddr(destination)
-        info = info_from_p2p_addr(maddr)
+        logging.info('%s%s destination: %s:%s', destination_peer_id, protocol_id,
+                     destination_address['ip'], destination_address['port'])
         with trio.move_on_after(timeout) as cancel_scope:
             try:
-                await self.host.connect(info)
-                logging.debug(
-                    f'{destination_peer_id}{protocol_id} Connected to peer.')
-
-                stream = await self.host.new_stream(info.peer_id, [protocol_id])
+                async with self.connection_pool.connection(destination_address, destination_peer_id) as info:
+                    logging.debug(
+                        '%s%s Connected to peer.', destination_peer_id, protocol_id)
 
-                logging.debug(
-                    f'{destination_peer_id}{protocol_id} Opened a new stream to peer')
+                    stream = await self.host.new_stream(info.peer_id, self.protocol_candidates(protocol_id))
 
-                encoded_message = json.dumps(message).encode('utf-8')
-                await stream.write(encoded_message)
-                logging.debug(
-                    f'{destination_peer_id}{protocol_id} Sent message: {encoded_message}')
+                    logging.debug('%s%s Opened a new stream to peer using %s',
+                                  destination_peer_id, protocol_id, stream.get_protocol())
 
-                await stream.close()
-                logging.debug(
-                    f'{destination_peer_id}{protocol_id} Closed the stream')
+                    encoded_message = encode_message(
+                        message, stream.get_protocol())
+                    BYTES_SENT.inc(len(encoded_message),
+                                   protocol=stream.get_protocol())
+                    self.bytes_sent += len(encoded_message)
+                    await stream.write(encoded_message)
+                    logging.debug('%s%s Sent message: %s', destination_peer_id,
+                                  protocol_id, payload(encoded_message))
 
-                if result is not None:
-                    response = await stream.read()
-                    logging.debug(
-                        f'{destination_peer_id}{protocol_id} Received response: {response}')
-                    result[destination_peer_id] = json.loads(
-                        response.decode('utf-8'))
-                    then = timeit.default_timer()
+                    await stream.close()
                     logging.debug(
-                        f'{destination_peer_id}{protocol_id} takes: {then - now} seconds.')
+                        '%s%s Closed the stream', destination_peer_id, protocol_id)
+
+                    if result is not None:
+                        response = await self.read_message(stream, on_item)
+                        logging.debug('%s%s Received response: %s', destination_peer_id,
+                                      protocol_id, payload(response))
+                        result[destination_peer_id] = response
+                        then = timeit.default_timer()
+                        logging.debug('%s%s takes: %s seconds.',
+                                      destination_peer_id, protocol_id, then - now)
+                        REQUEST_SECONDS.observe(then - now, protocol=protocol_id)
+                        RESPONSES.inc(protocol=protocol_id, status=str(
+                            response.get('status') if isinstance(response, dict) else None))
 
             except Exception as e:
                 logging.error(
@@ -137,10 +245,14 @@ class Libp2pBase:
                 }
                 if result is not None:
                     result[destination_peer_id] = response
+                RESPONSES.inc(protocol=protocol_id, status='ERROR')
+                await self.connection_pool.invalidate_if_dead(destination_peer_id)
 
         if cancel_scope.cancelled_caught:
             logging.error(
                 f'{destination_peer_id}{protocol_id} libp2p_base => Timeout error occurred')
+            TIMEOUTS.inc(protocol=protocol_id)
+            RESPONSES.inc(protocol=protocol_id, status='TIMEOUT')
             timeout_response = {
                 'status': 'TIMEOUT',
                 'error': 'Communication timed out',
@@ -6,4 +6,20 @@ PROTOCOLS_ID = {
     'round3': TProtocol('/muon/1.0.0/round3'),
     'generate_nonces': TProtocol('/muon/1.0.0/generate-nonces'),
     'sign': TProtocol('/muon/1.0.0/sign'),
+    'sign_batch': TProtocol('/muon/1.0.0/sign-batch'),
 }
+
+# Version 2.0.0 carries the same messages in the binary codec (see codec.py)
+BINARY_PROTOCOLS_ID = {
+    'round1': TProtocol('/muon/2.0.0/round1'),
+    'round2': TProtocol('/muon/2.0.0/round2'),
+    'round3': TProtocol('/muon/2.0.0/round3'),
+    'generate_nonces': TProtocol('/muon/2.0.0/generate-nonces'),
+    'sign': TProtocol('/muon/2.0.0/sign'),
+    'sign_batch': TProtocol('/muon/2.0.0/sign-batch'),
+}
+
+TO_BINARY_PROTOCOL = {
+    PROTOCOLS_ID[name]: protocol for name, protocol in BINARY_PROTOCOLS_ID.items()}
+TO_JSON_PROTOCOL = {
+    protocol: PROTOCOLS_ID[name] for name, protocol in BINARY_PROTOCOLS_ID.items()}
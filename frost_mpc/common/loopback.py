@@ -0,0 +1,188 @@
+from libp2p.crypto.secp256k1 import create_new_key_pair
+from libp2p.host.exceptions import StreamFailure, ConnectionFailure
+from libp2p.network.stream.exceptions import StreamEOF, StreamReset, StreamClosed
+from libp2p.peer.id import ID as PeerID
+from libp2p.peer.peerinfo import PeerInfo
+from libp2p.typing import TProtocol
+
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Sequence
+
+import logging
+import math
+import trio
+
+
+class LoopbackConnection:
+    # Stands in for the muxed connection a handler inspects to find its caller
+    def __init__(self, peer_id: PeerID) -> None:
+        self.peer_id: PeerID = peer_id
+        self.muxed_conn = self
+        self.is_closed: bool = False
+
+
+class LoopbackStream:
+    # One direction of an in-memory stream; close() is a half close like mplex
+    def __init__(self, protocol_id: TProtocol, remote_peer_id: PeerID,
+                 send_channel: trio.MemorySendChannel, receive_channel: trio.MemoryReceiveChannel) -> None:
+        self.protocol_id: TProtocol = protocol_id
+        self.muxed_conn = LoopbackConnection(remote_peer_id)
+        self.__send_channel = send_channel
+        self.__receive_channel = receive_channel
+        self.__buffer = bytearray()
+        self.__closed = False
+        self.remote: 'LoopbackStream' = None
+        self.is_reset: bool = False
+
+    def get_protocol(self) -> TProtocol:
+        return self.protocol_id
+
+    def set_protocol(self, protocol_id: TProtocol) -> None:
+        self.protocol_id = protocol_id
+
+    async def read(self, n: int = None) -> bytes:
+        if n is None:
+            data = bytearray(self.__buffer)
+            self.__buffer.clear()
+            try:
+                async for chunk in self.__receive_channel:
+                    data += chunk
+            except trio.ClosedResourceError:
+                pass
+            self.__check_reset()
+            return bytes(data)
+        if len(self.__buffer) == 0:
+            try:
+                self.__buffer += await self.__receive_channel.receive()
+            except (trio.EndOfChannel, trio.ClosedResourceError):
+                self.__check_reset()
+                raise StreamEOF
+        data = bytes(self.__buffer[:n])
+        del self.__buffer[:n]
+        return data
+
+    async def write(self, data: bytes) -> None:
+        if self.__closed:
+            raise StreamClosed('Cannot write to a closed stream')
+        self.__check_reset()
+        try:
+            self.__send_channel.send_nowait(bytes(data))
+        except trio.BrokenResourceError:
+            # The remote closed its receiving end, which only a reset does; surface it
+            # the way mplex does instead of leaking a trio exception to the caller
+            raise StreamReset('Stream was reset by the remote')
+
+    async def close(self) -> None:
+        if not self.__closed:
+            self.__closed = True
+            await self.__send_channel.aclose()
+
+    async def reset(self) -> None:
+        self.is_reset = True
+        if self.remote is not None:
+            self.remote.is_reset = True
+        await self.close()
+        await self.__receive_channel.aclose()
+
+    def __check_reset(self) -> None:
+        if self.is_reset:
+            raise StreamReset('Stream was reset')
+
+
+def loopback_stream_pair(protocol_id: TProtocol, local_peer_id: PeerID,
+                         remote_peer_id: PeerID) -> List[LoopbackStream]:
+    # Unbounded channels, so a writer never waits for its reader like on a real socket buffer
+    local_send, remote_receive = trio.open_memory_channel(math.inf)
+    remote_send, local_receive = trio.open_memory_channel(math.inf)
+    local = LoopbackStream(protocol_id, remote_peer_id,
+                           local_send, local_receive)
+    remote = LoopbackStream(protocol_id, local_peer_id,
+                            remote_send, remote_receive)
+    local.remote = remote
+    remote.remote = local
+    return [local, remote]
+
+
+class LoopbackNetwork:
+    # Every host created here can reach the others without sockets, handshakes or muxing
+    def __init__(self) -> None:
+        self.hosts: Dict[PeerID, 'LoopbackHost'] = {}
+
+    def create_host(self, secret: str) -> 'LoopbackHost':
+        # Same derivation as Libp2pBase, so the peer id matches the one in NodeInfo
+        key_pair = create_new_key_pair(bytes.fromhex(secret))
+        return LoopbackHost(self, PeerID.from_pubkey(key_pair.public_key))
+
+    def lookup(self, peer_id: PeerID) -> 'LoopbackHost':
+        host = self.hosts.get(peer_id)
+        if host is None or not host.is_running:
+            raise ConnectionFailure(f'Peer {peer_id} is not listening on the loopback network')
+        return host
+
+
+class LoopbackHost:
+    # Implements the part of IHost that Libp2pBase and ConnectionPool use
+    def __init__(self, network: LoopbackNetwork, peer_id: PeerID) -> None:
+        self.network: LoopbackNetwork = network
+        self.peer_id: PeerID = peer_id
+        self.connections: Dict[PeerID, LoopbackConnection] = {}
+        self.stream_handlers: Dict[TProtocol, Callable] = {}
+        self.is_running: bool = False
+        self.__nursery: trio.Nursery = None
+
+    def get_id(self) -> PeerID:
+        return self.peer_id
+
+    def get_network(self) -> 'LoopbackHost':
+        return self
+
+    @asynccontextmanager
+    async def run(self, listen_addrs: Sequence = ()):
+        # listen_addrs are accepted for interface compatibility and ignored
+        async with trio.open_nursery() as nursery:
+            self.__nursery = nursery
+            self.network.hosts[self.peer_id] = self
+            self.is_running = True
+            try:
+                yield self
+            finally:
+                self.is_running = False
+                self.network.hosts.pop(self.peer_id, None)
+                nursery.cancel_scope.cancel()
+
+    def set_stream_handler(self, protocol_id: TProtocol, stream_handler: Callable) -> None:
+        self.stream_handlers[protocol_id] = stream_handler
+
+    async def connect(self, peer_info: PeerInfo) -> None:
+        self.network.lookup(peer_info.peer_id)
+        self.connections[peer_info.peer_id] = LoopbackConnection(
+            peer_info.peer_id)
+
+    async def disconnect(self, peer_id: PeerID) -> None:
+        connection = self.connections.pop(peer_id, None)
+        if connection is not None:
+            connection.is_closed = True
+
+    async def new_stream(self, peer_id: PeerID, protocol_ids: Sequence[TProtocol]) -> LoopbackStream:
+        remote_host = self.network.lookup(peer_id)
+        # Protocols are tried in order, like multistream-select
+        for protocol_id in protocol_ids:
+            if protocol_id in remote_host.stream_handlers:
+                local, remote = loopback_stream_pair(
+                    protocol_id, self.peer_id, peer_id)
+                remote_host.handle(remote)
+                return local
+        raise StreamFailure(
+            f'Peer {peer_id} supports none of the protocols {list(protocol_ids)}')
+
+    def handle(self, stream: LoopbackStream) -> None:
+        self.__nursery.start_soon(self.__run_handler, stream)
+
+    async def __run_handler(self, stream: LoopbackStream) -> None:
+        # A failing handler resets its stream instead of tearing down the whole host
+        try:
+            await self.stream_handlers[stream.get_protocol()](stream)
+        except Exception as e:
+            logging.error(
+                f'{stream.muxed_conn.peer_id}{stream.get_protocol()} Loopback handler => Exception occurred: {type(e).__name__}: {e}')
+            await stream.reset()
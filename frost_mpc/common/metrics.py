@@ -0,0 +1,280 @@
+from ..abstract.metrics_sink import MetricsSink
+
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Tuple
+
+import threading
+import timeit
+import weakref
+import os
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(ABC):
+    metric_type = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> None:
+        self.name: str = name
+        self.documentation: str = documentation
+        self.labelnames: Tuple[str, ...] = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f'{self.name} expects labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        # One exposition line per label combination
+        pass
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {_escape(self.documentation)}',
+                 f'# TYPE {self.name} {self.metric_type}']
+        lines += self.samples()
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    metric_type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.__values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if amount < 0:
+            raise ValueError('Counters can only increase')
+        key = self._key(labels)
+        with self._lock:
+            self.__values[key] = self.__values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self.__values.get(self._key(labels), 0)
+
+    def total(self) -> float:
+        # Sum over every label combination
+        with self._lock:
+            return sum(self.__values.values())
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = list(self.__values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+                for key, value in values]
+
+
+class Gauge(Metric):
+    metric_type = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.__values: Dict[Tuple[str, ...], float] = {}
+        self.__functions: Dict[Tuple[str, ...], Tuple[Callable, weakref.ref]] = {}
+        # Filled by weakref callbacks, which may run from cyclic GC while _lock is held, so they
+        # only queue the removal; it is applied under the lock on the next access
+        self.__removed: Deque[Tuple[Tuple[str, ...], weakref.ref]] = deque()
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self.__values[key] = value
+
+    def set_function(self, function: Callable, owner: Any = None, **labels) -> None:
+        # Evaluated at export time, e.g. for pool sizes owned by another object. With an owner,
+        # function(owner) is called and only a weak reference is kept, so the gauge does not
+        # keep the owner alive and its sample goes away with it
+        key = self._key(labels)
+        owner_ref = None
+        if owner is not None:
+            owner_ref = weakref.ref(owner, lambda ref: self.__removed.append((key, ref)))
+        with self._lock:
+            self.__remove_functions()
+            self.__functions[key] = (function, owner_ref)
+
+    def __remove_functions(self) -> None:
+        # Caller holds _lock
+        while self.__removed:
+            key, owner_ref = self.__removed.popleft()
+            # Another owner may have registered the same labels since
+            if self.__functions.get(key, (None, None))[1] is owner_ref:
+                del self.__functions[key]
+
+    @staticmethod
+    def __call(function: Callable, owner_ref: weakref.ref) -> float:
+        if owner_ref is None:
+            return function()
+        owner = owner_ref()
+        if owner is None:
+            raise LookupError('Gauge owner is gone')
+        return function(owner)
+
+    def get(self, **labels) -> float:
+        key = self._key(labels)
+        if key in self.__functions:
+            return self.__call(*self.__functions[key])
+        return self.__values.get(key, 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            self.__remove_functions()
+            values = dict(self.__values)
+            functions = dict(self.__functions)
+        for key, (function, owner_ref) in functions.items():
+            try:
+                values[key] = self.__call(function, owner_ref)
+            except Exception:
+                continue
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+                for key, value in values.items()]
+
+
+class Histogram(Metric):
+    metric_type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets)) + (float('inf'),)
+        self.__counts: Dict[Tuple[str, ...], List[int]] = {}
+        self.__sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self.__counts.get(key)
+            if counts is None:
+                counts = [0] * len(self.buckets)
+                self.__counts[key] = counts
+                self.__sums[key] = 0.0
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self.__sums[key] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = timeit.default_timer()
+        try:
+            yield
+        finally:
+            self.observe(timeit.default_timer() - start, **labels)
+
+    def get_count(self, **labels) -> int:
+        return sum(self.__counts.get(self._key(labels), []))
+
+    def get_sum(self, **labels) -> float:
+        return self.__sums.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = [(key, list(counts), self.__sums[key])
+                      for key, counts in self.__counts.items()]
+        lines = []
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(
+                    self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self.__metrics: Dict[str, Metric] = {}
+        self.__lock = threading.Lock()
+
+    def __register(self, metric_class: type, name: str, documentation: str,
+                   labelnames: Tuple[str, ...], **kwargs) -> Metric:
+        # Registering the same name twice returns the existing metric
+        with self.__lock:
+            metric = self.__metrics.get(name)
+            if metric is None:
+                metric = metric_class(name, documentation, labelnames, **kwargs)
+                self.__metrics[name] = metric
+            elif not isinstance(metric, metric_class) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f'Metric {name} is already registered differently')
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.__register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self.__register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.__register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        with self.__lock:
+            metrics = list(self.__metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+    def export(self, sink: MetricsSink) -> None:
+        sink.write(self.render())
+
+
+class FileMetricsSink(MetricsSink):
+    # Suitable for the node_exporter textfile collector; the file is replaced atomically
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+
+    def write(self, text: str) -> None:
+        temporary_path = f'{self.path}.tmp'
+        with open(temporary_path, 'w') as file:
+            file.write(text)
+        os.replace(temporary_path, self.path)
+
+
+REGISTRY = MetricsRegistry()
+
+HANDLER_SECONDS = REGISTRY.histogram(
+    'frost_handler_seconds', 'Time spent in node protocol handlers', ('protocol',))
+REQUEST_SECONDS = REGISTRY.histogram(
+    'frost_request_seconds', 'Round trip time of outgoing requests, including the remote handler', ('protocol',))
+CRYPTO_SECONDS = REGISTRY.histogram(
+    'frost_crypto_seconds', 'Time spent in cryptographic operations run through the executor', ('operation',))
+BYTES_SENT = REGISTRY.counter(
+    'frost_bytes_sent_total', 'Encoded message bytes written to streams', ('protocol',))
+BYTES_RECEIVED = REGISTRY.counter(
+    'frost_bytes_received_total', 'Encoded message bytes read from streams', ('protocol',))
+RESPONSES = REGISTRY.counter(
+    'frost_responses_total', 'Responses to outgoing requests by status', ('protocol', 'status'))
+TIMEOUTS = REGISTRY.counter(
+    'frost_timeouts_total', 'Outgoing requests that timed out', ('protocol',))
+NONCE_POOL_SIZE = REGISTRY.gauge(
+    'frost_nonce_pool_size', 'Private nonces available for signing', ('node',))
+NONCE_PREGENERATED = REGISTRY.gauge(
+    'frost_nonce_pregenerated', 'Nonces computed ahead of time and not yet handed out', ('node',))
+KEY_CACHE = REGISTRY.gauge(
+    'frost_key_cache', 'Distributed key cache statistics', ('node', 'stat'))
@@ -0,0 +1,66 @@
+from . import pyfrost
+from .executor import CryptoExecutor
+
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+
+import logging
+import trio
+
+
+class NoncePool:
+    # Nonces computed ahead of time and not yet handed out to any SA
+    def __init__(self, executor: CryptoExecutor = None, low_watermark: int = 100,
+                 high_watermark: int = 500, chunk_size: int = 50) -> None:
+        if not 0 <= low_watermark <= high_watermark:
+            raise ValueError(
+                'Watermarks must satisfy 0 <= low_watermark <= high_watermark')
+        if executor is not None:
+            self.executor = executor
+        else:
+            self.executor = CryptoExecutor()
+        self.low_watermark: int = low_watermark
+        self.high_watermark: int = high_watermark
+        self.chunk_size: int = chunk_size
+        self.__pending: Deque[Tuple[Dict, Dict]] = deque()
+        self.__refill_needed = trio.Event()
+
+    def __len__(self) -> int:
+        return len(self.__pending)
+
+    async def generate(self, staking_id: int, number_of_nonces: int) -> Tuple[List[Dict], List[Dict]]:
+        # Same result as pyfrost.nonce_preprocess, served from the pool when possible
+        nonces, save_data = [], []
+        while self.__pending and len(nonces) < number_of_nonces:
+            nonce, private = self.__pending.popleft()
+            nonces.append(nonce)
+            save_data.append(private)
+        missing = number_of_nonces - len(nonces)
+        if missing > 0:
+            extra_nonces, extra_save_data = await self.executor.run(
+                pyfrost.nonce_preprocess, staking_id, missing)
+            nonces += extra_nonces
+            save_data += extra_save_data
+        if len(self.__pending) < self.low_watermark:
+            self.__refill_needed.set()
+        return nonces, save_data
+
+    async def run(self, staking_id: int) -> None:
+        # Refills up to the high watermark whenever the pool drops below the low one
+        while True:
+            if len(self.__pending) >= self.low_watermark:
+                self.__refill_needed = trio.Event()
+                await self.__refill_needed.wait()
+            while len(self.__pending) < self.high_watermark:
+                # Small chunks, so requests are served from the pool while it refills
+                size = min(self.chunk_size, self.high_watermark -
+                           len(self.__pending))
+                try:
+                    nonces, save_data = await self.executor.run(
+                        pyfrost.nonce_preprocess, staking_id, size)
+                except Exception as e:
+                    logging.error(
+                        f'Nonce pool => Exception occurred: {type(e).__name__}: {e}')
+                    await trio.sleep(1)
+                    continue
+                self.__pending.extend(zip(nonces, save_data))
@@ -0,0 +1,55 @@
+from collections import OrderedDict
+from typing import Dict, List
+
+import threading
+import json
+
+
+class NonceStore:
+    # Private nonces indexed by the key of their public commitment
+    def __init__(self) -> None:
+        self.__nonces: 'OrderedDict[str, Dict]' = OrderedDict()
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def get_key(commitment: Dict) -> str:
+        return json.dumps(commitment, sort_keys=True)
+
+    def add(self, nonces: Dict[str, Dict], replace: bool = False, max_size: int = None) -> int:
+        # Returns the number of oldest nonces evicted to stay within max_size
+        with self.__lock:
+            if replace:
+                self.__nonces = OrderedDict()
+            self.__nonces.update(nonces)
+            evicted = 0
+            if max_size is not None:
+                while len(self.__nonces) > max_size:
+                    self.__nonces.popitem(last=False)
+                    evicted += 1
+            return evicted
+
+    def pop(self, commitment_key: str) -> Dict:
+        # Removal happens under the lock, so a nonce is handed out at most once
+        with self.__lock:
+            return self.__nonces.pop(commitment_key, None)
+
+    def values(self) -> List[Dict]:
+        with self.__lock:
+            return list(self.__nonces.values())
+
+    def replace_values(self, nonces_list: List[Dict]) -> None:
+        # Legacy list interface: entries still present keep their commitment key
+        with self.__lock:
+            keys = {self.get_key(nonce): key for key,
+                    nonce in self.__nonces.items()}
+            nonces = OrderedDict()
+            for nonce in nonces_list:
+                nonce_key = self.get_key(nonce)
+                nonces[keys.get(nonce_key, nonce_key)] = nonce
+            self.__nonces = nonces
+
+    def __len__(self) -> int:
+        return len(self.__nonces)
+
+    def __contains__(self, commitment_key: str) -> bool:
+        return commitment_key in self.__nonces
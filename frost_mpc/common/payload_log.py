@@ -0,0 +1,62 @@
+from typing import Any
+
+import hashlib
+import reprlib
+import pprint
+
+PAYLOAD_LOG_MODES = ('full', 'truncate', 'hash')
+
+_settings = {
+    'mode': 'full',
+    'max_length': 512,
+}
+
+
+def set_payload_log_mode(mode: str, max_length: int = 512) -> None:
+    # full: as before; truncate: first max_length characters; hash: size and digest only
+    if mode not in PAYLOAD_LOG_MODES:
+        raise ValueError(
+            f'Payload log mode must be one of {PAYLOAD_LOG_MODES}, not {mode}')
+    _settings['mode'] = mode
+    _settings['max_length'] = max_length
+
+
+class LazyPayload:
+    # Formatted only if a log record is actually emitted, so disabled levels cost no formatting
+    __slots__ = ('payload', 'pretty')
+
+    def __init__(self, payload: Any, pretty: bool = False) -> None:
+        self.payload = payload
+        self.pretty = pretty
+
+    def __str__(self) -> str:
+        mode = _settings['mode']
+        if mode == 'hash':
+            data = self.payload if isinstance(self.payload, (bytes, bytearray)) \
+                else repr(self.payload).encode('utf-8')
+            return f'<{type(self.payload).__name__} {len(data)} bytes sha256:{hashlib.sha256(data).hexdigest()[:16]}>'
+        if mode == 'truncate':
+            return self.__truncated(_settings['max_length'])
+        return pprint.pformat(self.payload) if self.pretty else str(self.payload)
+
+    def __truncated(self, max_length: int) -> str:
+        # reprlib stops early on large containers, so the cost is bounded by max_length
+        if isinstance(self.payload, (bytes, bytearray)):
+            text = repr(bytes(self.payload[:max_length]))
+            if len(self.payload) > max_length:
+                text += f'... ({len(self.payload)} bytes)'
+            return text
+        limits = reprlib.Repr()
+        limits.maxlevel = 4
+        limits.maxdict = limits.maxlist = limits.maxtuple = limits.maxset = 8
+        limits.maxstring = limits.maxother = limits.maxlong = max_length
+        text = limits.repr(self.payload)
+        if len(text) > max_length:
+            text = f'{text[:max_length]}...'
+        return text
+
+    __repr__ = __str__
+
+
+def payload(data: Any, pretty: bool = False) -> LazyPayload:
+    return LazyPayload(data, pretty)
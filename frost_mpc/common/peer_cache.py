@@ -0,0 +1,76 @@
+from libp2p.crypto.secp256k1 import Secp256k1PublicKey
+from ..abstract.node_info import NodeInfo
+
+from typing import Dict, List
+
+import timeit
+
+
+class UnknownPeerError(KeyError):
+    # Raised by PeerCache.resolve when the underlying NodeInfo has no record for a peer
+    pass
+
+
+class ResolvedPeer:
+    # Everything the coordinator derives from one lookup_node result
+    def __init__(self, peer_id: str, info: Dict, expires_at: float) -> None:
+        self.peer_id: str = peer_id
+        self.info: Dict = info
+        self.expires_at: float = expires_at
+        self.address: Dict[str, str] = {
+            'ip': info['ip'], 'port': info['port']}
+        self.staking_id: str = str(info['staking_id'])
+        self.__public_key: Secp256k1PublicKey = None
+
+    @property
+    def public_key(self) -> Secp256k1PublicKey:
+        # Deserialized on first use, since only signature checks need it
+        if self.__public_key is None:
+            self.__public_key = Secp256k1PublicKey.deserialize(
+                bytes.fromhex(self.info['public_key']))
+        return self.__public_key
+
+
+class PeerCache(NodeInfo):
+    # A NodeInfo in front of another one, so remote lookups happen once per ttl seconds
+    def __init__(self, node_info: NodeInfo, ttl: float = 300.0) -> None:
+        self.node_info: NodeInfo = node_info
+        self.ttl: float = ttl
+        self.__peers: Dict[str, ResolvedPeer] = {}
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def resolve(self, peer_id: str) -> ResolvedPeer:
+        peer_id = str(peer_id)
+        now = timeit.default_timer()
+        peer = self.__peers.get(peer_id)
+        if peer is not None and peer.expires_at > now:
+            self.hits += 1
+            return peer
+        self.misses += 1
+        info = self.node_info.lookup_node(peer_id)
+        if info is None:
+            # Unknown peers are not cached, so they are found once they register
+            self.__peers.pop(peer_id, None)
+            raise UnknownPeerError(f'Peer {peer_id} is unknown')
+        peer = ResolvedPeer(peer_id, info, now + self.ttl)
+        self.__peers[peer_id] = peer
+        return peer
+
+    def lookup_node(self, peer_id: str):
+        try:
+            return self.resolve(peer_id).info
+        except UnknownPeerError:
+            return None
+
+    def get_all_nodes(self, n: int = None) -> List[str]:
+        return self.node_info.get_all_nodes(n)
+
+    def invalidate(self, peer_id: str = None) -> None:
+        if peer_id is None:
+            self.__peers.clear()
+        else:
+            self.__peers.pop(str(peer_id), None)
+
+    def __len__(self) -> int:
+        return len(self.__peers)
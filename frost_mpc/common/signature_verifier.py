@@ -0,0 +1,96 @@
+from libp2p.crypto.secp256k1 import Secp256k1PublicKey
+from ..abstract.node_info import NodeInfo
+from .executor import CryptoExecutor
+from .peer_cache import PeerCache
+
+from typing import Dict, List, Tuple
+
+import logging
+import trio
+import json
+
+
+class SignatureVerifier:
+    def __init__(self, node_info: NodeInfo, executor: CryptoExecutor = None, chunk_size: int = 8) -> None:
+        self.node_info: NodeInfo = node_info
+        self.chunk_size: int = chunk_size
+        if executor is not None:
+            self.executor = executor
+        else:
+            self.executor = CryptoExecutor()
+        self.__public_keys: Dict[str, Secp256k1PublicKey] = {}
+
+    def get_public_key(self, peer_id: str) -> Secp256k1PublicKey:
+        if isinstance(self.node_info, PeerCache):
+            # The cache expires keys with the rest of the peer's record
+            return self.node_info.resolve(peer_id).public_key
+        public_key = self.__public_keys.get(peer_id)
+        if public_key is None:
+            public_key_bytes = bytes.fromhex(
+                self.node_info.lookup_node(peer_id)['public_key'])
+            public_key = Secp256k1PublicKey.deserialize(public_key_bytes)
+            self.__public_keys[peer_id] = public_key
+        return public_key
+
+    def invalidate(self, peer_id: str) -> None:
+        self.__public_keys.pop(peer_id, None)
+        if isinstance(self.node_info, PeerCache):
+            self.node_info.invalidate(peer_id)
+
+    def verify(self, peer_id: str, data, validation: str) -> bool:
+        try:
+            public_key = self.get_public_key(peer_id)
+        except Exception as e:
+            logging.error(
+                f'{peer_id} Signature verifier => Exception occurred: {type(e).__name__}: {e}')
+            return False
+        return self.verify_with_key(peer_id, public_key, data, validation)
+
+    @staticmethod
+    def verify_with_key(peer_id: str, public_key: Secp256k1PublicKey, data, validation: str) -> bool:
+        # Touches neither node_info nor any cache, so it is safe on worker threads
+        try:
+            data_bytes = json.dumps(data).encode('utf-8')
+            return public_key.verify(data_bytes, bytes.fromhex(validation))
+        except Exception as e:
+            logging.error(
+                f'{peer_id} Signature verifier => Exception occurred: {type(e).__name__}: {e}')
+            return False
+
+    @staticmethod
+    def verify_with_keys(items: List[Tuple[str, Secp256k1PublicKey, Dict, str]]) -> Dict[str, bool]:
+        return {peer_id: public_key is not None and
+                SignatureVerifier.verify_with_key(peer_id, public_key, data, validation)
+                for peer_id, public_key, data, validation in items}
+
+    def verify_batch(self, signed_data: Dict[str, Dict], data_key: str = 'broadcast') -> Dict[str, bool]:
+        return {peer_id: self.verify(peer_id, data[data_key], data['validation'])
+                for peer_id, data in signed_data.items()}
+
+    async def verify_batch_async(self, signed_data: Dict[str, Dict], data_key: str = 'broadcast') -> Dict[str, bool]:
+        # Keys are resolved here on the event loop; worker threads only get the key objects,
+        # so neither node_info nor a PeerCache is ever used from another thread
+        items = []
+        for peer_id, data in signed_data.items():
+            try:
+                public_key = self.get_public_key(peer_id)
+            except Exception as e:
+                logging.error(
+                    f'{peer_id} Signature verifier => Exception occurred: {type(e).__name__}: {e}')
+                public_key = None
+            items.append((peer_id, public_key, data[data_key], data['validation']))
+
+        peer_ids = list(signed_data.keys())
+        chunks = [items[i:i + self.chunk_size]
+                  for i in range(0, len(items), self.chunk_size)]
+        results = {}
+
+        async def verify_chunk(chunk: List[Tuple[str, Secp256k1PublicKey, Dict, str]]) -> None:
+            # Key objects cannot be pickled, so verification stays on threads
+            results.update(await self.executor.run_in_thread(
+                self.verify_with_keys, chunk))
+
+        async with trio.open_nursery() as nursery:
+            for chunk in chunks:
+                nursery.start_soon(verify_chunk, chunk)
+        return {peer_id: results[peer_id] for peer_id in peer_ids}
@@ -0,0 +1,68 @@
+from . import pyfrost
+from .executor import CryptoExecutor
+
+from typing import Any, Callable, Dict
+
+import trio
+
+
+class SigningSession:
+    # Per (dkg_key, commitments_dict) state that verification and aggregation would
+    # otherwise each recompute: the decoded nonces and the SA-side aggregated nonce.
+    def __init__(self, dkg_key: Dict, commitments_dict: Dict, executor: CryptoExecutor = None,
+                 verify_single_signature: Callable = None, verify_group_signature: Callable = None) -> None:
+        self.dkg_key: Dict = dkg_key
+        self.commitments_dict: Dict = commitments_dict
+        if executor is not None:
+            self.executor = executor
+        else:
+            self.executor = CryptoExecutor()
+        # Same signatures as pyfrost's functions, which do the scalar multiplications against the
+        # public key and shares. pyfrost takes no precomputed fixed-base tables, so a replacement
+        # that keeps them per DKG key is where they would be plugged in
+        self.verify_single_signature: Callable = verify_single_signature or pyfrost.verify_single_signature
+        self.verify_group_signature: Callable = verify_group_signature or pyfrost.verify_group_signature
+        self.__decoded_nonces: Dict[str, Any] = {}
+        self.__aggregated_nonce_codes: Dict[str, str] = {}
+        self.__aggregate_nonce_lock = trio.Lock()
+
+    def public_share(self, signer_id) -> Any:
+        return self.dkg_key['public_shares'][str(signer_id)]
+
+    def decode_nonce(self, code: str) -> Any:
+        # Honest signers all report the same nonce, so this decodes once per session
+        point = self.__decoded_nonces.get(code)
+        if point is None:
+            point = pyfrost.Utils.code_to_pub(code)
+            self.__decoded_nonces[code] = point
+        return point
+
+    async def aggregated_nonce_code(self, message: str) -> str:
+        # Computed by the SA itself, only when signers disagree, and at most once per message
+        async with self.__aggregate_nonce_lock:
+            code = self.__aggregated_nonce_codes.get(message)
+            if code is None:
+                point = await self.executor.run(
+                    pyfrost.aggregate_nonce, message, self.commitments_dict, self.dkg_key['public_key'])
+                code = pyfrost.Utils.pub_to_code(point)
+                self.__aggregated_nonce_codes[message] = code
+                # aggregate() decodes the same code again for honest signers
+                self.__decoded_nonces.setdefault(code, point)
+            return code
+
+    async def verify_share(self, response: Dict) -> bool:
+        sign = response['signature_data']
+        return await self.executor.run(
+            self.verify_single_signature, sign['id'], response['hash'], self.commitments_dict,
+            self.decode_nonce(sign['aggregated_public_nonce']), self.public_share(sign['id']),
+            sign, self.dkg_key['public_key'])
+
+    async def verify_group(self, aggregated_sign: Dict) -> bool:
+        return await self.executor.run(self.verify_group_signature, aggregated_sign)
+
+    async def aggregate(self, message: str, signatures: Dict[str, Dict]) -> Dict:
+        signs = [response['signature_data'] for response in signatures.values()]
+        aggregated_nonce = self.decode_nonce(
+            signs[0]['aggregated_public_nonce'])
+        return await self.executor.run(
+            pyfrost.aggregate_signatures, message, signs, aggregated_nonce, self.dkg_key['public_key'])
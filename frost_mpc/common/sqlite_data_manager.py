@@ -0,0 +1,109 @@
+from ..abstract.data_manager import DataManager
+from .nonce_store import NonceStore
+
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+import threading
+import sqlite3
+import json
+
+
+class SqliteDataManager(DataManager):
+    # Disk-backed DataManager: every write is a transaction and a popped nonce is
+    # deleted before it is returned, so it cannot be reused after a crash.
+    # Values are stored as JSON, never pickled, so the file cannot carry code; like the
+    # JSON wire protocol, dict keys come back as strings.
+    # With WAL, synchronous=NORMAL commits survive a process crash without an fsync per
+    # write on the event loop; FULL also survives power loss, at one fsync per commit
+    def __init__(self, path: str, synchronous: str = 'NORMAL') -> None:
+        if synchronous not in ('NORMAL', 'FULL'):
+            raise ValueError('synchronous must be NORMAL or FULL')
+        self.path: str = path
+        self.__lock = threading.RLock()
+        self.__connection = sqlite3.connect(
+            path, isolation_level=None, check_same_thread=False)
+        self.__connection.execute('PRAGMA journal_mode=WAL')
+        self.__connection.execute(f'PRAGMA synchronous={synchronous}')
+        with self.transaction() as cursor:
+            cursor.execute(
+                'CREATE TABLE IF NOT EXISTS dkg_keys (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+            cursor.execute(
+                'CREATE TABLE IF NOT EXISTS nonces (id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                'commitment_key TEXT NOT NULL UNIQUE, nonce TEXT NOT NULL)')
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Cursor]:
+        with self.__lock:
+            cursor = self.__connection.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                yield cursor
+            except BaseException:
+                cursor.execute('ROLLBACK')
+                raise
+            cursor.execute('COMMIT')
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__connection.close()
+
+    def get_nonces(self) -> List:
+        with self.__lock:
+            rows = self.__connection.execute(
+                'SELECT nonce FROM nonces ORDER BY id').fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def set_nonces(self, nonces_list: List) -> None:
+        # Legacy list interface: entries still present keep their commitment key
+        with self.transaction() as cursor:
+            rows = cursor.execute(
+                'SELECT commitment_key, nonce FROM nonces').fetchall()
+            keys = {NonceStore.get_key(json.loads(nonce)): key for key, nonce in rows}
+            cursor.execute('DELETE FROM nonces')
+            cursor.executemany('INSERT OR REPLACE INTO nonces (commitment_key, nonce) VALUES (?, ?)', [
+                (keys.get(NonceStore.get_key(nonce), NonceStore.get_key(nonce)), json.dumps(nonce))
+                for nonce in nonces_list])
+
+    def add_nonces(self, nonces: Dict[str, Dict], replace: bool = False, max_size: int = None) -> int:
+        with self.transaction() as cursor:
+            if replace:
+                cursor.execute('DELETE FROM nonces')
+            cursor.executemany('INSERT OR REPLACE INTO nonces (commitment_key, nonce) VALUES (?, ?)', [
+                (key, json.dumps(nonce)) for key, nonce in nonces.items()])
+            evicted = 0
+            if max_size is not None:
+                count = cursor.execute(
+                    'SELECT COUNT(*) FROM nonces').fetchone()[0]
+                if count > max_size:
+                    cursor.execute(
+                        'DELETE FROM nonces WHERE id IN (SELECT id FROM nonces ORDER BY id LIMIT ?)',
+                        (count - max_size,))
+                    evicted = count - max_size
+            return evicted
+
+    def pop_nonce(self, commitment_key: str) -> Dict:
+        with self.transaction() as cursor:
+            row = cursor.execute(
+                'SELECT id, nonce FROM nonces WHERE commitment_key = ?', (commitment_key,)).fetchone()
+            if row is None:
+                return None
+            cursor.execute('DELETE FROM nonces WHERE id = ?', (row[0],))
+        return json.loads(row[1])
+
+    def get_nonces_count(self) -> int:
+        with self.__lock:
+            return self.__connection.execute('SELECT COUNT(*) FROM nonces').fetchone()[0]
+
+    def set_dkg_key(self, key, value) -> None:
+        with self.transaction() as cursor:
+            cursor.execute('INSERT OR REPLACE INTO dkg_keys (key, value) VALUES (?, ?)',
+                           (str(key), json.dumps(value)))
+
+    def get_dkg_key(self, key):
+        with self.__lock:
+            row = self.__connection.execute(
+                'SELECT value FROM dkg_keys WHERE key = ?', (str(key),)).fetchone()
+        if row is None:
+            return {}
+        return json.loads(row[0])
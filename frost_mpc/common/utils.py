@@ -1,6 +1,8 @@
 from libp2p.crypto.secp256k1 import create_new_key_pair
 from libp2p.peer.id import ID as PeerID
+from .codec import encode
 
+import hashlib
 import logging
 import uuid
 import secrets
@@ -35,6 +37,10 @@ class Utils:
             'peer_id': peer_id.to_base58()
         }
 
+    @staticmethod
+    def get_digest(data: Dict) -> str:
+        return hashlib.sha256(encode(data)).hexdigest()
+
     @staticmethod
     def get_request(url) -> Dict:
         try:
@@ -1,45 +1,162 @@
-from libp2p.crypto.secp256k1 import Secp256k1PublicKey
 from libp2p.peer.id import ID as PeerID
 from libp2p.host.host_interface import IHost
-from typing import List, Dict
+from libp2p.typing import TProtocol
+from typing import List, Dict, Tuple, Union
 
 from .abstract.node_info import NodeInfo
+from .abstract.metrics_sink import MetricsSink
 from .common.libp2p_base import Libp2pBase
+from .common.connection_pool import ConnectionPool
 from .common.libp2p_protocols import PROTOCOLS_ID
 from .common.utils import Utils
 from .common.utils import RequestObject
+from .common.codec import CachedMessage
+from .common.payload_log import payload
+from .common.signature_verifier import SignatureVerifier
+from .common.executor import CryptoExecutor
+from .common.peer_cache import PeerCache
 
-import pprint
+import timeit
+import types
 import trio
 import logging
-import json
 
 
 class Dkg(Libp2pBase):
     def __init__(self, address: Dict[str, str], secret: str, node_info: NodeInfo,
-                 max_workers: int = 0, default_timeout: int = 200, host:  IHost = None) -> None:
+                 max_workers: int = 0, default_timeout: int = 200, host:  IHost = None,
+                 connection_pool: ConnectionPool = None, binary_codec: bool = False,
+                 round1_bundle: bool = True, executor: CryptoExecutor = None,
+                 max_peer_requests: int = 0, max_concurrent_dkgs: int = 0,
+                 metrics_sink: MetricsSink = None, peer_cache_ttl: float = 300.0) -> None:
 
-        super().__init__(address, secret, host)
+        super().__init__(address, secret, host, connection_pool, binary_codec, metrics_sink)
 
-        self.node_info: NodeInfo = node_info
+        # Pass a PeerCache to share resolved peers with an SA on the same host
+        if isinstance(node_info, PeerCache):
+            self.node_info: PeerCache = node_info
+        else:
+            self.node_info: PeerCache = PeerCache(node_info, peer_cache_ttl)
         if max_workers != 0:
             self.semaphore = trio.Semaphore(max_workers)
         else:
             self.semaphore = None
         self.default_timeout = default_timeout
+        # Per-peer limits apply on top of the global semaphore when many DKGs share the host
+        self.max_peer_requests = max_peer_requests
+        self.peer_semaphores: Dict[str, trio.Semaphore] = {}
+        if max_concurrent_dkgs != 0:
+            self.dkg_semaphore = trio.Semaphore(max_concurrent_dkgs)
+        else:
+            self.dkg_semaphore = None
+        self.round1_bundle = round1_bundle
+        self.verifier = SignatureVerifier(self.node_info, executor)
+
+    async def __send_to_peer(self, destination_address: Dict[str, str], destination_peer_id: str, protocol_id: TProtocol,
+                             message: Union[Dict, CachedMessage], result: Dict, on_item: types.FunctionType = None) -> None:
+        if self.max_peer_requests == 0:
+            await self.send(destination_address, destination_peer_id, protocol_id,
+                            message, result, self.default_timeout, self.semaphore, on_item)
+            return
+        peer_semaphore = self.peer_semaphores.get(destination_peer_id)
+        if peer_semaphore is None:
+            peer_semaphore = trio.Semaphore(self.max_peer_requests)
+            self.peer_semaphores[destination_peer_id] = peer_semaphore
+        async with peer_semaphore:
+            await self.send(destination_address, destination_peer_id, protocol_id,
+                            message, result, self.default_timeout, self.semaphore, on_item)
+
+    def __fail(self, failure: Dict, call_method: str, cancel_scope: trio.CancelScope) -> None:
+        # The first failing round is reported and the DKG's outstanding requests are cancelled
+        failure.setdefault('call_method', call_method)
+        cancel_scope.cancel()
+
+    async def __send_round1(self, destination_address: Dict[str, str], destination_peer_id: str,
+                            message: Dict, result: Dict, failure: Dict, cancel_scope: trio.CancelScope) -> None:
+        await self.__send_to_peer(destination_address, destination_peer_id, PROTOCOLS_ID['round1'],
+                                  message, result)
+        response = result[destination_peer_id]
+        if response['status'] != 'SUCCESSFUL':
+            self.__fail(failure, 'round1', cancel_scope)
+            return
+        # Verify each peer as soon as it answers instead of waiting for the slowest one
+        verifications = await self.verifier.verify_batch_async(
+            {destination_peer_id: response})
+        if not verifications[destination_peer_id]:
+            response['status'] = 'MALICIOUS'
+            failure.setdefault('malicious', []).append(destination_peer_id)
+            self.__fail(failure, 'round1', cancel_scope)
+
+    async def __send_round2(self, destination_address: Dict[str, str], destination_peer_id: str,
+                            message: CachedMessage, digest_message: CachedMessage, result: Dict,
+                            round2_shares: Dict[str, List], failure: Dict, cancel_scope: trio.CancelScope,
+                            on_done: types.FunctionType) -> None:
+        received = []
+
+        def index_share(entry: Dict) -> None:
+            # Index the shares by receiver as they arrive so round3 can pick its slice directly
+            received.append(entry)
+            round2_shares.setdefault(entry['receiver_id'], []).append(entry)
 
-    def __gather_round2_data(self, peer_id: str, data: Dict) -> List:
-        round2_data = []
-        for _, round_data in data.items():
-            for entry in round_data['broadcast']:
-                if entry['receiver_id'] == peer_id:
-                    round2_data.append(entry)
-        return round2_data
+        def discard_received() -> None:
+            for entry in received:
+                round2_shares[entry['receiver_id']].remove(entry)
+            received.clear()
+
+        await self.__send_to_peer(destination_address, destination_peer_id, PROTOCOLS_ID['round2'],
+                                  message, result, index_share)
+        if result[destination_peer_id]['status'] == 'ERROR' and digest_message is not None:
+            # A node keeps the bundle as soon as it has read it, so after a dropped stream
+            # one retry with the digest only is usually enough
+            discard_received()
+            await self.__send_to_peer(destination_address, destination_peer_id, PROTOCOLS_ID['round2'],
+                                      digest_message, result, index_share)
+            if result[destination_peer_id]['status'] == 'BUNDLE_REQUIRED':
+                discard_received()
+                await self.__send_to_peer(destination_address, destination_peer_id, PROTOCOLS_ID['round2'],
+                                          message, result, index_share)
+        response = result[destination_peer_id]
+        if response['status'] != 'SUCCESSFUL':
+            self.__fail(failure, 'round2', cancel_scope)
+            return
+        # JSON and unframed responses carry the shares in the message itself
+        if len(received) == 0:
+            for entry in response.get('broadcast', []):
+                index_share(entry)
+        on_done()
+
+    async def __send_round3(self, destination_address: Dict[str, str], destination_peer_id: str,
+                            message: Dict, result: Dict, failure: Dict, cancel_scope: trio.CancelScope) -> None:
+        await self.__send_to_peer(destination_address, destination_peer_id, PROTOCOLS_ID['round3'],
+                                  message, result)
+        if result[destination_peer_id]['status'] != 'SUCCESSFUL':
+            self.__fail(failure, 'round3', cancel_scope)
+
+    def __get_round2_parameters(self, dkg_id: str, round1_response: Dict) -> Dict:
+        if not self.round1_bundle:
+            return {
+                'dkg_id': dkg_id,
+                'broadcasted_data': round1_response
+            }
+        # Statuses are dropped and the digest lets a node reuse a bundle it already holds
+        bundle = {}
+        for peer_id, data in round1_response.items():
+            bundle[peer_id] = {
+                'broadcast': data['broadcast'],
+                'validation': data['validation'],
+            }
+        return {
+            'dkg_id': dkg_id,
+            'bundle_digest': Utils.get_digest(bundle),
+            'bundle': bundle
+        }
 
     async def request_dkg(self, threshold: int, party: List[str], app_name: str, node_info: NodeInfo) -> Dict:
         logging.info(
-            f'Requesting DKG with threshold: {threshold}, party: {party}, app name: {app_name}.')
+            'Requesting DKG with threshold: %s, party: %s, app name: %s.', threshold, payload(party), app_name)
         dkg_id = Utils.generate_random_uuid()
+        if node_info is self.node_info.node_info:
+            node_info = self.node_info
 
         if len(party) < threshold:
             response = {
@@ -61,97 +178,93 @@ class Dkg(Libp2pBase):
         }
         request_object = RequestObject(dkg_id, call_method, parameters)
         round1_response = {}
+        failure = {}
         async with trio.open_nursery() as nursery:
             for peer_id in party:
                 destination_address = self.node_info.lookup_node(peer_id)
-                nursery.start_soon(self.send, destination_address, peer_id,
-                                   PROTOCOLS_ID[call_method], request_object.get(), round1_response, self.default_timeout, self.semaphore)
+                nursery.start_soon(self.__send_round1, destination_address, peer_id,
+                                   request_object.get(), round1_response, failure, nursery.cancel_scope)
 
         logging.debug(
-            f'Round1 dictionary response: \n{pprint.pformat(round1_response)}')
-        for response in round1_response.values():
-            if response['status'] == 'SUCCESSFUL':
-                continue
+            'Round1 dictionary response: \n%s', payload(round1_response, pretty=True))
+
+        if len(failure) > 0:
             response = {
                 'result': 'FAILED',
                 'dkg_id': dkg_id,
                 'call_method': call_method,
                 'response': round1_response
             }
-            logging.info(f'DKG request result: {response}')
+            if 'malicious' in failure:
+                logging.error(
+                    f'DKG id {dkg_id} has FAILED due to invalid round1 signatures from {failure["malicious"]}')
+            else:
+                logging.info('DKG request result: %s', payload(response))
             return response
 
-        # TODO: error handling (if verification failed)
-        for peer_id, data in round1_response.items():
-            data_bytes = json.dumps(data['broadcast']).encode('utf-8')
-            validation = bytes.fromhex(data['validation'])
-            public_key_bytes = bytes.fromhex(
-                self.node_info.lookup_node(peer_id)['public_key'])
-
-            public_key = Secp256k1PublicKey.deserialize(public_key_bytes)
-            logging.debug(
-                f'Verification of sent data from {peer_id}: {public_key.verify(data_bytes, validation)}')
-
         call_method = 'round2'
-        parameters = {
-            'dkg_id': dkg_id,
-            'broadcasted_data': round1_response
-        }
+        parameters = self.__get_round2_parameters(dkg_id, round1_response)
         request_object = RequestObject(dkg_id, call_method, parameters)
+        message = CachedMessage(request_object.get())
+        digest_message = None
+        if 'bundle' in parameters:
+            digest_parameters = {key: value for key,
+                                 value in parameters.items() if key != 'bundle'}
+            digest_message = CachedMessage(RequestObject(
+                dkg_id, call_method, digest_parameters).get())
 
         round2_response = {}
+        round2_shares = {}
+        round3_response = {}
         async with trio.open_nursery() as nursery:
+
+            def dispatch_round3() -> None:
+                # A node stores its key share in round3, so nothing is sent before every round2
+                # has succeeded; a later round2 failure could not be rolled back otherwise
+                if len(round2_response) < len(party) or any(
+                        response['status'] != 'SUCCESSFUL' for response in round2_response.values()):
+                    return
+                for peer_id in party:
+                    destination_address = self.node_info.lookup_node(peer_id)
+                    parameters = {
+                        'dkg_id': dkg_id,
+                        'send_data': round2_shares.get(destination_address['staking_id'], [])
+                    }
+                    request_object = RequestObject(dkg_id, 'round3', parameters)
+                    nursery.start_soon(self.__send_round3, destination_address, peer_id,
+                                       request_object.get(), round3_response, failure, nursery.cancel_scope)
+
             for peer_id in party:
                 destination_address = self.node_info.lookup_node(peer_id)
-                nursery.start_soon(self.send, destination_address, peer_id,
-                                   PROTOCOLS_ID[call_method], request_object.get(), round2_response, self.default_timeout, self.semaphore)
+                nursery.start_soon(self.__send_round2, destination_address, peer_id,
+                                   message, digest_message, round2_response, round2_shares, failure,
+                                   nursery.cancel_scope, dispatch_round3)
 
         logging.debug(
-            f'Round2 dictionary response: \n{pprint.pformat(round2_response)}')
+            'Round2 dictionary response: \n%s', payload(round2_response, pretty=True))
+        logging.debug(
+            'Round3 dictionary response: \n%s', payload(round3_response, pretty=True))
 
-        for response in round2_response.values():
-            if response['status'] == 'SUCCESSFUL':
-                continue
+        if failure.get('call_method') == 'round2':
             response = {
                 'result': 'FAILED',
                 'dkg_id': dkg_id,
-                'call_method': call_method,
+                'call_method': 'round2',
                 'response': round2_response,
             }
-            logging.info(f'DKG request result: {response}')
+            logging.info('DKG request result: %s', payload(response))
             return response
 
-        call_method = 'round3'
-
-        round3_response = {}
-
-        async with trio.open_nursery() as nursery:
-            for peer_id in party:
-                parameters = {
-                    'dkg_id': dkg_id,
-                    'send_data': self.__gather_round2_data(self.node_info.lookup_node(peer_id)['staking_id'], round2_response)
-                }
-                request_object = RequestObject(dkg_id, call_method, parameters)
-
-                destination_address = self.node_info.lookup_node(peer_id)
-                nursery.start_soon(self.send, destination_address, peer_id,
-                                   PROTOCOLS_ID[call_method], request_object.get(), round3_response, self.default_timeout, self.semaphore)
-
-        logging.debug(
-            f'Round3 dictionary response: \n{pprint.pformat(round3_response)}')
-
-        for response in round3_response.values():
-            if response['status'] == 'SUCCESSFUL':
-                continue
+        if failure.get('call_method') == 'round3':
             response = {
                 'result': 'FAILED',
                 'dkg_id': dkg_id,
-                'call_method': call_method,
+                'call_method': 'round3',
                 'round1_response': round1_response,
                 'round2_response': round2_response,
                 'response': round3_response
             }
-            logging.info(f'DKG request result: {response}')
+            logging.info('DKG request result: %s', payload(response))
             return response
 
         for id1, data1 in round3_response.items():
@@ -175,8 +288,50 @@ class Dkg(Libp2pBase):
             'public_key': public_key,
             'public_shares': public_shares,
             'party': party,
+            'threshold': threshold,
             'validations': validations,
             'result': 'SUCCESSFUL'
         }
-        logging.info(f'DKG response: {response}')
+        logging.info('DKG response: %s', payload(response))
         return response
+
+    async def request_dkg_batch(self, requests: List[Tuple[int, List[str], str]], node_info: NodeInfo) -> Dict:
+        # Runs one DKG per (threshold, party, app_name) concurrently over the shared host
+        responses: List[Dict] = [None] * len(requests)
+
+        async def run_dkg(index: int, threshold: int, party: List[str], app_name: str) -> None:
+            # One failing DKG must not cancel the rest of the batch
+            try:
+                if self.dkg_semaphore is not None:
+                    async with self.dkg_semaphore:
+                        responses[index] = await self.request_dkg(threshold, party, app_name, node_info)
+                else:
+                    responses[index] = await self.request_dkg(threshold, party, app_name, node_info)
+            except Exception as e:
+                logging.error(
+                    f'DKG batch => Exception occurred: {type(e).__name__}: {e}')
+                responses[index] = {
+                    'result': 'FAILED',
+                    'dkg_id': None,
+                    'error': f'{type(e).__name__}: {e}',
+                    'response': {}
+                }
+
+        start_time = timeit.default_timer()
+        async with trio.open_nursery() as nursery:
+            for index, (threshold, party, app_name) in enumerate(requests):
+                nursery.start_soon(run_dkg, index, threshold,
+                                   party, app_name)
+        elapsed = timeit.default_timer() - start_time
+
+        successful = sum(
+            1 for response in responses if response['result'] == 'SUCCESSFUL')
+        dkgs_per_minute = successful * 60 / elapsed if elapsed > 0 else 0.0
+        logging.info(
+            f'DKG batch: {successful}/{len(requests)} successful in {elapsed} seconds ({dkgs_per_minute:.2f} DKGs per minute)')
+        return {
+            'responses': responses,
+            'successful': successful,
+            'seconds': elapsed,
+            'dkgs_per_minute': dkgs_per_minute,
+        }
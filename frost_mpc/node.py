@@ -1,42 +1,77 @@
 from .common.libp2p_base import Libp2pBase
 from .common.pyfrost.distributed_key import DistributedKey
-from .common import pyfrost
-from .common.libp2p_protocols import PROTOCOLS_ID
+from .common.libp2p_protocols import PROTOCOLS_ID, TO_JSON_PROTOCOL
+from .common.codec import CodecError
+from .common.utils import Utils
+from .common.signature_verifier import SignatureVerifier
+from .common.executor import CryptoExecutor
+from .common.nonce_store import NonceStore
+from .common.nonce_pool import NoncePool
+from .common.key_cache import DistributedKeyCache
+from .common.payload_log import payload
+from .common.metrics import HANDLER_SECONDS, NONCE_POOL_SIZE, NONCE_PREGENERATED, KEY_CACHE
+from .abstract.metrics_sink import MetricsSink
 from .abstract.node_info import NodeInfo
 from .abstract.data_manager import DataManager
 
 from libp2p.network.stream.net_stream_interface import INetStream
+from libp2p.host.host_interface import IHost
 from libp2p.peer.id import ID as PeerID
-from libp2p.crypto.secp256k1 import Secp256k1PublicKey
 
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 import json
 import logging
+import timeit
 import types
+import trio
+
+# Layout of dkg_data['key_state']; keys stored under another version are not rebuilt
+KEY_STATE_VERSION = 1
 
 
 def auth_decorator(handler):
     async def wrapper(self, stream: INetStream):
         try:
-            if self.caller_validator(stream.muxed_conn.peer_id.to_base58(), stream.get_protocol()):
-                return await handler(self, stream)
+            # Validators only know the JSON protocol ids, so map binary ones back
+            protocol_id = TO_JSON_PROTOCOL.get(
+                stream.get_protocol(), stream.get_protocol())
+            if self.caller_validator(stream.muxed_conn.peer_id.to_base58(), protocol_id):
+                with HANDLER_SECONDS.time(protocol=protocol_id):
+                    return await handler(self, stream)
             else:
                 logging.error(
                     'Node Decorator => Exception occurred. Unauthorized SA.')
                 raise Exception('Unauthorized SA')
-        except json.JSONDecodeError:
-            raise Exception('Invalid JSON data')
+        except (json.JSONDecodeError, CodecError):
+            raise Exception('Invalid message data')
     return wrapper
 
 
 class Node(Libp2pBase):
     def __init__(self, data_manager: DataManager, address: Dict[str, str],
                  secret: str, node_info: NodeInfo, caller_validator: types.FunctionType,
-                 data_validator: types.FunctionType) -> None:
-        super().__init__(address, secret)
+                 data_validator: types.FunctionType, executor: CryptoExecutor = None,
+                 max_nonces: int = None, nonce_pool: NoncePool = None,
+                 max_distributed_keys: int = 1000, metrics_sink: MetricsSink = None,
+                 host: IHost = None) -> None:
+        super().__init__(address, secret, host=host, metrics_sink=metrics_sink)
         self.node_info: NodeInfo = node_info
-        self.distributed_keys: Dict[str, DistributedKey] = {}
+        self.max_nonces: int = max_nonces
+        if executor is not None:
+            self.executor = executor
+        else:
+            self.executor = CryptoExecutor()
+        if nonce_pool is not None:
+            self.nonce_pool = nonce_pool
+        else:
+            self.nonce_pool = NoncePool(self.executor)
+        self.distributed_keys = DistributedKeyCache(max_distributed_keys)
+        self.__round1_bundles: Dict[str, Tuple[str, Dict, float]] = {}
+        # Bundles and locks of DKGs that never reach round3 are dropped after this many seconds
+        self.dkg_state_ttl: float = 600.0
+        self.__dkg_locks: Dict[str, Tuple[trio.Lock, float]] = {}
+        self.verifier = SignatureVerifier(node_info, self.executor)
         self.caller_validator = caller_validator
         self.data_validator = data_validator
         # Define handlers for various protocol methods
@@ -46,15 +81,71 @@ class Node(Libp2pBase):
             'round3': self.round3_handler,
             'generate_nonces': self.generate_nonces_handler,
             'sign': self.sign_handler,
+            'sign_batch': self.sign_batch_handler,
         }
         self.set_protocol_and_handler(PROTOCOLS_ID, handlers)
         self.data_manager: DataManager = data_manager
-
-    def update_distributed_key(self, dkg_id: str) -> None:
+        # Labelled per node, since several nodes may share the process-wide registry
+        node_label = self.peer_id.to_base58()
+        NONCE_POOL_SIZE.set_function(
+            lambda node: node.data_manager.get_nonces_count(), owner=self, node=node_label)
+        NONCE_PREGENERATED.set_function(
+            lambda node: len(node.nonce_pool), owner=self, node=node_label)
+        for stat in ('size', 'hits', 'misses', 'evictions'):
+            KEY_CACHE.set_function(
+                lambda node, stat=stat: node.distributed_keys.stats()[stat], owner=self,
+                node=node_label, stat=stat)
+
+    async def run(self) -> None:
+        staking_id = self.node_info.lookup_node(
+            self.peer_id.to_base58())['staking_id']
+        async with trio.open_nursery() as nursery:
+            if self.nonce_pool.high_watermark > 0:
+                nursery.start_soon(self.nonce_pool.run, int(staking_id))
+            await super().run()
+            nursery.cancel_scope.cancel()
+
+    async def update_distributed_key(self, dkg_id: str) -> DistributedKey:
+        # Callers keep the returned object, since the cache may evict it while they await
         result = self.distributed_keys.get(dkg_id)
         if result is not None:
-            return
-        # TODO: Implement for retrieving distributed key object
+            return result
+        # Rebuilt by replaying round3 on the inputs save_distributed_key persisted, so only
+        # pyfrost's public API is used; only a finished DKG is trusted
+        dkg_data = self.data_manager.get_dkg_key(dkg_id)
+        key_state = dkg_data.get('key_state')
+        if not dkg_data.get('complete') or not isinstance(key_state, dict) or \
+                key_state.get('version') != KEY_STATE_VERSION:
+            raise KeyError(f'Distributed key {dkg_id} is not available')
+        party = dkg_data['party']
+        partners = [str(self.node_info.lookup_node(peer_id)['staking_id'])
+                    for peer_id in party if peer_id != self.peer_id.to_base58()]
+        staking_id = self.node_info.lookup_node(
+            self.peer_id.to_base58())['staking_id']
+        distributed_key = DistributedKey(
+            dkg_id, dkg_data['threshold'], len(party), staking_id, partners)
+        round3_data = await self.executor.run_in_thread(
+            distributed_key.round3, dkg_data['distributed_key']['round1_broadcasted_data'],
+            key_state['round3_send_data'], dkg_data['distributed_key']['data'])
+        if round3_data['status'] != 'SUCCESSFUL':
+            raise KeyError(f'Distributed key {dkg_id} could not be rebuilt')
+        # Another handler may have rebuilt it meanwhile
+        if dkg_id in self.distributed_keys:
+            return self.distributed_keys[dkg_id]
+        self.distributed_keys[dkg_id] = distributed_key
+        return distributed_key
+
+    def save_distributed_key(self, dkg_id: str, round3_send_data: List[Dict], dkg_data: Dict = None) -> None:
+        # Called once round3 has succeeded. Together with the round1/round2 data already
+        # stored, the shares received in round3 are all it takes to rebuild the key
+        if dkg_data is None:
+            dkg_data = self.data_manager.get_dkg_key(dkg_id)
+        dkg_data['key_state'] = {
+            'version': KEY_STATE_VERSION,
+            'round3_send_data': round3_send_data,
+        }
+        dkg_data['complete'] = True
+        self.data_manager.set_dkg_key(dkg_id, dkg_data)
 
     def add_new_key(self, dkg_id: str, threshold, party: List[str], app_name: str) -> None:
         assert self.peer_id in party, f'This node is not amoung specified party for app {dkg_id}'
@@ -63,24 +154,92 @@ class Node(Libp2pBase):
 
         partners = [str(self.node_info.lookup_node(peer_id)['staking_id'])
                     for peer_id in party if peer_id != self.peer_id.to_base58()]
-        dkg_data = {'app_name': app_name}
+        dkg_data = {
+            'app_name': app_name,
+            'threshold': threshold,
+            'party': party,
+        }
         self.data_manager.set_dkg_key(dkg_id, dkg_data)
         staking_id = self.node_info.lookup_node(
             self.peer_id.to_base58())['staking_id']
 
+        # Pinned until round3 ends, since a running DKG cannot be rebuilt from the store
+        self.distributed_keys.pin(dkg_id)
         self.distributed_keys[dkg_id] = DistributedKey(
             dkg_id, threshold, len(party), staking_id, partners)
 
     def remove_key(self, dkg_id: str) -> None:
-        if self.distributed_keys.get(dkg_id) is not None:
+        self.__round1_bundles.pop(dkg_id, None)
+        self.__dkg_locks.pop(dkg_id, None)
+        self.distributed_keys.unpin(dkg_id)
+        if dkg_id in self.distributed_keys:
             del self.distributed_keys[dkg_id]
+        # DataManager has no delete, so the stored state is cleared for update_distributed_key
+        dkg_data = self.data_manager.get_dkg_key(dkg_id)
+        if 'key_state' in dkg_data or 'complete' in dkg_data:
+            dkg_data.pop('key_state', None)
+            dkg_data.pop('complete', None)
+            self.data_manager.set_dkg_key(dkg_id, dkg_data)
+
+    def __get_dkg_lock(self, dkg_id: str) -> trio.Lock:
+        now = timeit.default_timer()
+        for expired_id in [key for key, (lock, used_at) in self.__dkg_locks.items()
+                           if now - used_at > self.dkg_state_ttl and not lock.locked()
+                           and lock.statistics().tasks_waiting == 0]:
+            del self.__dkg_locks[expired_id]
+            # An abandoned DKG never reaches round3, so its key would stay pinned
+            self.distributed_keys.unpin(expired_id)
+        lock, _ = self.__dkg_locks.get(dkg_id, (trio.Lock(), now))
+        self.__dkg_locks[dkg_id] = (lock, now)
+        return lock
+
+    def __get_round1_bundle(self, dkg_id: str, parameters: Dict) -> Tuple[Dict, Dict]:
+        digest = parameters['bundle_digest']
+        bundle = parameters.get('bundle')
+        if bundle is None:
+            cached_digest, bundle, _ = self.__round1_bundles.get(
+                dkg_id, (None, None, None))
+            if cached_digest != digest:
+                return None, {
+                    'status': 'BUNDLE_REQUIRED',
+                    'error': f'Round1 bundle {digest} is not available',
+                }
+            return bundle, None
+        if Utils.get_digest(bundle) != digest:
+            return None, {
+                'status': 'FAILED',
+                'error': 'Round1 bundle digest mismatch',
+            }
+        now = timeit.default_timer()
+        for expired_id in [key for key, (_, _, stored_at) in self.__round1_bundles.items()
+                           if now - stored_at > self.dkg_state_ttl]:
+            del self.__round1_bundles[expired_id]
+        self.__round1_bundles[dkg_id] = (digest, bundle, now)
+        return bundle, None
+
+    async def __sign(self, dkg_id: str, commitments_list: Dict, input_data: Dict) -> Dict:
+        staking_id = self.node_info.lookup_node(
+            self.peer_id.to_base58())['staking_id']
+        commitment = commitments_list[str(staking_id)]
+        distributed_key = await self.update_distributed_key(dkg_id)
+        # Rejected input must not cost the SA a nonce
+        result = self.data_validator(input_data)
+        # Consumed before signing, so a nonce is never used twice even if signing fails
+        nonce = self.data_manager.pop_nonce(NonceStore.get_key(commitment))
+        if nonce is None:
+            return {
+                'status': 'FAILED',
+                'error': 'Nonce is not available',
+            }
+        result['signature_data'], _ = await self.executor.run_in_thread(
+            distributed_key.sign, commitments_list, result['hash'], [nonce])
+        result['status'] = 'SUCCESSFUL'
+        return result
 
     @auth_decorator
     async def round1_handler(self, stream: INetStream) -> None:
 
-        message = await stream.read()
-        message = message.decode('utf-8')
-        data = json.loads(message)
+        data = await self.read_message(stream)
 
         sender_id = stream.muxed_conn.peer_id
         parameters = data['parameters']
@@ -88,32 +247,33 @@ class Node(Libp2pBase):
         app_name = parameters['app_name']
 
         logging.debug(
-            f'{sender_id}{PROTOCOLS_ID["round1"]} Got message: {message}')
-
-        self.add_new_key(
-            dkg_id,
-            parameters['threshold'],
-            parameters['party'],
-            app_name
-        )
-
-        self.update_distributed_key(dkg_id)
-        round1_broadcast_data, save_data = self.distributed_keys[dkg_id].round1(
-        )
-        dkg_data = self.data_manager.get_dkg_key(dkg_id)
-        dkg_data['distributed_key'] = save_data
-        self.data_manager.set_dkg_key(dkg_id, dkg_data)
+            '%s%s Got message: %s', sender_id, PROTOCOLS_ID['round1'], payload(data))
+
+        # Handlers for different DKGs run concurrently; one DKG's rounds never interleave
+        async with self.__get_dkg_lock(dkg_id):
+            self.add_new_key(
+                dkg_id,
+                parameters['threshold'],
+                parameters['party'],
+                app_name
+            )
+
+            distributed_key = await self.update_distributed_key(dkg_id)
+            round1_broadcast_data, save_data = await self.executor.run_in_thread(
+                distributed_key.round1)
+            dkg_data = self.data_manager.get_dkg_key(dkg_id)
+            dkg_data['distributed_key'] = save_data
+            self.data_manager.set_dkg_key(dkg_id, dkg_data)
         broadcast_bytes = json.dumps(round1_broadcast_data).encode('utf-8')
         data = {
             'broadcast': round1_broadcast_data,
             'validation': self._key_pair.private_key.sign(broadcast_bytes).hex(),
             'status': 'SUCCESSFUL',
         }
-        response = json.dumps(data).encode('utf-8')
         try:
-            await stream.write(response)
+            await self.write_message(stream, data)
             logging.debug(
-                f'{sender_id}{PROTOCOLS_ID["round1"]} Sent message: {response.decode()}')
+                '%s%s Sent message: %s', sender_id, PROTOCOLS_ID['round1'], payload(data))
         except Exception as e:
             logging.error(
                 f'Node => Exception occurred: {type(e).__name__}: {e}')
@@ -123,47 +283,62 @@ class Node(Libp2pBase):
     @auth_decorator
     async def round2_handler(self, stream: INetStream) -> None:
 
-        message = await stream.read()
-        message = message.decode('utf-8')
-        data = json.loads(message)
+        data = await self.read_message(stream)
 
         sender_id = stream.muxed_conn.peer_id
         parameters = data['parameters']
         dkg_id = parameters['dkg_id']
-        whole_broadcasted_data = parameters['broadcasted_data']
 
         logging.debug(
-            f'{sender_id}{PROTOCOLS_ID["round2"]} Got message: {message}')
-
-        broadcasted_data = []
-        for peer_id, data in whole_broadcasted_data.items():
-            # TODO: error handling (if verification failed)
-            data_bytes = json.dumps(data['broadcast']).encode('utf-8')
-            validation = bytes.fromhex(data['validation'])
-            public_key_bytes = bytes.fromhex(
-                self.node_info.lookup_node(peer_id)['public_key'])
-            public_key = Secp256k1PublicKey.deserialize(public_key_bytes)
-            broadcasted_data.append(data['broadcast'])
-            logging.debug(
-                f'Verification of sent data from {peer_id}: {public_key.verify(data_bytes, validation)}')
+            '%s%s Got message: %s', sender_id, PROTOCOLS_ID['round2'], payload(data))
+
+        if 'bundle_digest' in parameters:
+            whole_broadcasted_data, error = self.__get_round1_bundle(
+                dkg_id, parameters)
+        else:
+            whole_broadcasted_data, error = parameters['broadcasted_data'], None
+
+        if error is None:
+            verifications = await self.verifier.verify_batch_async(whole_broadcasted_data)
+            invalid_peer_ids = [peer_id for peer_id,
+                                is_valid in verifications.items() if not is_valid]
+            if len(invalid_peer_ids) > 0:
+                error = {
+                    'status': 'FAILED',
+                    'error': f'Invalid round1 signatures from {invalid_peer_ids}',
+                }
+
+        if error is not None:
+            try:
+                await self.write_message(stream, error)
+                logging.debug(
+                    '%s%s Sent message: %s', sender_id, PROTOCOLS_ID['round2'], payload(error))
+            except Exception as e:
+                logging.error(
+                    f'Node => Exception occurred: {type(e).__name__}: {e}')
+            await stream.close()
+            return
 
-        self.update_distributed_key(dkg_id)
-        dkg_data = self.data_manager.get_dkg_key(dkg_id)
-        round2_broadcast_data, save_data = self.distributed_keys[dkg_id].round2(broadcasted_data,
-                                                                                dkg_data['distributed_key']['data'])
+        broadcasted_data = [data['broadcast']
+                            for data in whole_broadcasted_data.values()]
 
-        dkg_data['distributed_key']['data'].update(save_data['data'])
-        dkg_data['distributed_key']['round1_broadcasted_data'] = broadcasted_data
-        self.data_manager.set_dkg_key(dkg_id, dkg_data)
+        async with self.__get_dkg_lock(dkg_id):
+            distributed_key = await self.update_distributed_key(dkg_id)
+            dkg_data = self.data_manager.get_dkg_key(dkg_id)
+            round2_broadcast_data, save_data = await self.executor.run_in_thread(
+                distributed_key.round2, broadcasted_data, dkg_data['distributed_key']['data'])
+
+            dkg_data['distributed_key']['data'].update(save_data['data'])
+            dkg_data['distributed_key']['round1_broadcasted_data'] = broadcasted_data
+            self.data_manager.set_dkg_key(dkg_id, dkg_data)
         data = {
             'broadcast': round2_broadcast_data,
             'status': 'SUCCESSFUL',
         }
-        response = json.dumps(data).encode('utf-8')
         try:
-            await stream.write(response)
+            await self.write_message(stream, data, 'broadcast')
             logging.debug(
-                f'{sender_id}{PROTOCOLS_ID["round2"]} Sent message: {response.decode()}')
+                '%s%s Sent message: %s', sender_id, PROTOCOLS_ID['round2'], payload(data))
         except Exception as e:
             logging.error(
                 f'Node => Exception occurred: {type(e).__name__}: {e}')
@@ -173,9 +348,7 @@ class Node(Libp2pBase):
     @auth_decorator
     async def round3_handler(self, stream: INetStream) -> None:
 
-        message = await stream.read()
-        message = message.decode('utf-8')
-        data = json.loads(message)
+        data = await self.read_message(stream)
 
         sender_id = stream.muxed_conn.peer_id
         parameters = data['parameters']
@@ -183,14 +356,24 @@ class Node(Libp2pBase):
         send_data = parameters['send_data']
 
         logging.debug(
-            f'{sender_id}{PROTOCOLS_ID["round3"]} Got message: {message}')
+            '%s%s Got message: %s', sender_id, PROTOCOLS_ID['round3'], payload(data))
 
-        self.update_distributed_key(dkg_id)
-        dkg_data = self.data_manager.get_dkg_key(dkg_id)
-        round3_data = self.distributed_keys[dkg_id].round3(dkg_data['distributed_key']['round1_broadcasted_data'],
-                                                           send_data, dkg_data['distributed_key']['data'])
-        if round3_data['status'] == 'COMPLAINT':
-            self.remove_key(dkg_id)
+        try:
+            async with self.__get_dkg_lock(dkg_id):
+                distributed_key = await self.update_distributed_key(dkg_id)
+                dkg_data = self.data_manager.get_dkg_key(dkg_id)
+                round3_data = await self.executor.run_in_thread(
+                    distributed_key.round3, dkg_data['distributed_key']['round1_broadcasted_data'],
+                    send_data, dkg_data['distributed_key']['data'])
+                if round3_data['status'] == 'COMPLAINT':
+                    self.remove_key(dkg_id)
+                elif round3_data['status'] == 'SUCCESSFUL':
+                    self.save_distributed_key(dkg_id, send_data)
+        finally:
+            # round3 is the last round, whatever its outcome
+            self.__round1_bundles.pop(dkg_id, None)
+            self.__dkg_locks.pop(dkg_id, None)
+            self.distributed_keys.unpin(dkg_id)
 
         round3_data['validation'] = None
         if round3_data['status'] == 'SUCCESSFUL':
@@ -203,11 +386,10 @@ class Node(Libp2pBase):
             'status': round3_data['status'],
             'validation': round3_data['validation']
         }
-        response = json.dumps(data).encode('utf-8')
         try:
-            await stream.write(response)
+            await self.write_message(stream, data)
             logging.debug(
-                f'{sender_id}{PROTOCOLS_ID["round3"]} Sent message: {response.decode()}')
+                '%s%s Sent message: %s', sender_id, PROTOCOLS_ID['round3'], payload(data))
         except Exception as e:
             logging.error(
                 f'Node => Exception occurred: {type(e).__name__}: {e}')
@@ -216,30 +398,36 @@ class Node(Libp2pBase):
 
     @auth_decorator
     async def generate_nonces_handler(self, stream: INetStream) -> None:
-        message = await stream.read()
-        message = message.decode('utf-8')
-        data = json.loads(message)
+        data = await self.read_message(stream)
 
         sender_id = stream.muxed_conn.peer_id
         parameters = data['parameters']
         number_of_nonces = parameters['number_of_nonces']
 
         logging.debug(
-            f'{sender_id}{PROTOCOLS_ID["generate_nonces"]} Got message: {message}')
+            '%s%s Got message: %s', sender_id, PROTOCOLS_ID['generate_nonces'], payload(data))
         staking_id = self.node_info.lookup_node(
             self.peer_id.to_base58())['staking_id']
-        nonces, save_data = pyfrost.nonce_preprocess(
+        nonces, save_data = await self.nonce_pool.generate(
             int(staking_id), number_of_nonces)
-        self.data_manager.set_nonces(save_data)
+        # Appended, so commitments the SA still holds from earlier batches stay usable
+        evicted = self.data_manager.add_nonces({
+            NonceStore.get_key(commitment): nonce
+            for commitment, nonce in zip(nonces, save_data)
+        }, max_size=self.max_nonces)
         data = {
             'nonces': nonces,
+            'pool': {
+                'size': self.data_manager.get_nonces_count(),
+                'evicted': evicted,
+                'max_size': self.max_nonces,
+            },
             'status': 'SUCCESSFUL',
         }
-        response = json.dumps(data).encode('utf-8')
         try:
-            await stream.write(response)
+            await self.write_message(stream, data, 'nonces')
             logging.debug(
-                f'{sender_id}{PROTOCOLS_ID["generate_nonces"]} Sent message: {response.decode()}')
+                '%s%s Sent message: %s', sender_id, PROTOCOLS_ID['generate_nonces'], payload(data))
         except Exception as e:
             logging.error(
                 f'Node=> Exception occurred: {type(e).__name__}: {e}')
@@ -247,9 +435,7 @@ class Node(Libp2pBase):
 
     @auth_decorator
     async def sign_handler(self, stream: INetStream) -> None:
-        message = await stream.read()
-        message = message.decode('utf-8')
-        data = json.loads(message)
+        data = await self.read_message(stream)
         sender_id = stream.muxed_conn.peer_id
         parameters = data['parameters']
         dkg_id = parameters['dkg_id']
@@ -257,28 +443,62 @@ class Node(Libp2pBase):
         input_data = data['input_data']
 
         logging.debug(
-            f'{sender_id}{PROTOCOLS_ID["sign"]} Got message: {message}')
+            '%s%s Got message: %s', sender_id, PROTOCOLS_ID['sign'], payload(data))
         result = {}
         # try:
-        result = self.data_validator(input_data)
-        self.update_distributed_key(dkg_id)
-        nonces = self.data_manager.get_nonces()
-        result['signature_data'], remove_data = self.distributed_keys[dkg_id].sign(
-            commitments_list, result['hash'], nonces)
-        nonces.remove(remove_data)
-        self.data_manager.set_nonces(nonces)
-        result['status'] = 'SUCCESSFUL'
+        result = await self.__sign(dkg_id, commitments_list, input_data)
         # except Exception as e:
         #     logging.error(
         #         f'Node=> Exception occurred: {type(e).__name__}: {e}')
         #     result = {
         #         'status': 'FAILED'
         #     }
-        response = json.dumps(result).encode('utf-8')
         try:
-            await stream.write(response)
+            await self.write_message(stream, result)
+            logging.debug(
+                '%s%s Sent message: %s', sender_id, PROTOCOLS_ID['sign'], payload(result))
+        except Exception as e:
+            logging.error(
+                f'Node=> Exception occurred: {type(e).__name__}: {e}')
+
+        await stream.close()
+
+    @auth_decorator
+    async def sign_batch_handler(self, stream: INetStream) -> None:
+        data = await self.read_message(stream)
+        sender_id = stream.muxed_conn.peer_id
+        parameters = data['parameters']
+        dkg_id = parameters['dkg_id']
+        commitments_lists = parameters['commitments_lists']
+        input_data_list = data['input_data']
+
+        logging.debug(
+            '%s%s Got message: %s', sender_id, PROTOCOLS_ID['sign_batch'], payload(data))
+        if len(commitments_lists) != len(input_data_list):
+            result = {
+                'status': 'FAILED',
+                'error': f'Got {len(commitments_lists)} commitments lists for {len(input_data_list)} inputs',
+            }
+        else:
+            signatures = []
+            for commitments_list, input_data in zip(commitments_lists, input_data_list):
+                try:
+                    signatures.append(await self.__sign(
+                        dkg_id, commitments_list, input_data))
+                except Exception as e:
+                    logging.error(
+                        f'Node=> Exception occurred: {type(e).__name__}: {e}')
+                    signatures.append({
+                        'status': 'FAILED'
+                    })
+            result = {
+                'signatures': signatures,
+                'status': 'SUCCESSFUL',
+            }
+        try:
+            await self.write_message(stream, result, 'signatures')
             logging.debug(
-                f'{sender_id}{PROTOCOLS_ID["sign"]} Sent message: {response.decode()}')
+                '%s%s Sent message: %s', sender_id, PROTOCOLS_ID['sign_batch'], payload(result))
         except Exception as e:
             logging.error(
                 f'Node=> Exception occurred: {type(e).__name__}: {e}')
@@ -1,18 +1,23 @@
 import json
 from .common.libp2p_base import Libp2pBase
+from .common.connection_pool import ConnectionPool
+from .common.executor import CryptoExecutor
+from .common.commitment_manager import CommitmentManager
+from .common.signing_session import SigningSession
+from .common.peer_cache import PeerCache
+from .common.payload_log import payload
 from .common.libp2p_protocols import PROTOCOLS_ID
-from .common import pyfrost
 from .common.utils import Utils
 from .common.utils import RequestObject
 from .abstract.node_info import NodeInfo
+from .abstract.metrics_sink import MetricsSink
 
 from libp2p.host.host_interface import IHost
 from libp2p.peer.id import ID as PeerID
 from libp2p.typing import TProtocol
-from typing import List, Dict
+from typing import Callable, List, Dict, Tuple
 
 import types
-import pprint
 import trio
 import logging
 
@@ -20,40 +25,58 @@ import logging
 class SA(Libp2pBase):
 
     def __init__(self, address: Dict[str, str], secret: str, node_info: NodeInfo,
-                 max_workers: int = 0, default_timeout: int = 50, host: IHost = None) -> None:
+                 max_workers: int = 0, default_timeout: int = 50, host: IHost = None,
+                 connection_pool: ConnectionPool = None, binary_codec: bool = False,
+                 executor: CryptoExecutor = None, metrics_sink: MetricsSink = None,
+                 optimistic_verification: bool = True, peer_cache_ttl: float = 300.0,
+                 verify_single_signature: Callable = None, verify_group_signature: Callable = None) -> None:
 
-        super().__init__(address, secret, host)
-        self.node_info: NodeInfo = node_info
+        super().__init__(address, secret, host, connection_pool, binary_codec, metrics_sink)
+        if isinstance(node_info, PeerCache):
+            self.node_info: PeerCache = node_info
+        else:
+            self.node_info: PeerCache = PeerCache(node_info, peer_cache_ttl)
         self.token = ''
         if max_workers != 0:
             self.semaphore = trio.Semaphore(max_workers)
         else:
             self.semaphore = None
         self.default_timeout = default_timeout
+        if executor is not None:
+            self.executor = executor
+        else:
+            self.executor = CryptoExecutor()
+        self.commitment_manager = CommitmentManager(self)
+        # Verify only the aggregate and check single shares when it fails, instead of every share upfront
+        self.optimistic_verification: bool = optimistic_verification
+        # Replacements for pyfrost's verification functions, passed to every SigningSession
+        self.verify_single_signature: Callable = verify_single_signature
+        self.verify_group_signature: Callable = verify_group_signature
 
     async def request_nonces(self, party: List, number_of_nonces: int = 10):
         nonces = {}
-        for peer_id in party:
-            req_id = Utils.generate_random_uuid()
-            call_method = 'generate_nonces'
-            parameters = {
-                'number_of_nonces': number_of_nonces,
-            }
-            request_object = RequestObject(req_id, call_method, parameters)
+        call_method = 'generate_nonces'
+        async with trio.open_nursery() as nursery:
+            for peer_id in party:
+                req_id = Utils.generate_random_uuid()
+                parameters = {
+                    'number_of_nonces': number_of_nonces,
+                }
+                request_object = RequestObject(req_id, call_method, parameters)
 
-            destination_address = self.node_info.lookup_node(peer_id)
-            await self.send(destination_address, peer_id,
-                            PROTOCOLS_ID[call_method], request_object.get(), nonces, self.default_timeout, self.semaphore)
+                destination_address = self.node_info.lookup_node(peer_id)
+                nursery.start_soon(self.send, destination_address, peer_id,
+                                   PROTOCOLS_ID[call_method], request_object.get(), nonces, self.default_timeout, self.semaphore)
 
-            logging.debug(
-                f'Nonces dictionary response: \n{pprint.pformat(nonces)}')
+        logging.debug(
+            'Nonces dictionary response: \n%s', payload(nonces, pretty=True))
         return nonces
 
     async def request_signature(self, dkg_key: Dict, commitments_dict: Dict,
                                 input_data: Dict, sign_party: List) -> Dict:
         call_method = 'sign'
         dkg_id = dkg_key['dkg_id']
-        if not set(sign_party).issubset(set(dkg_key['party'])):
+        if len(sign_party) == 0 or not set(sign_party).issubset(set(dkg_key['party'])):
             response = {
                 'result': 'FAILED',
                 'signatures': None
@@ -67,16 +90,196 @@ class SA(Libp2pBase):
         request_object = RequestObject(
             dkg_id, call_method, parameters, input_data)
 
+        session = self.__new_session(dkg_key, commitments_dict)
         signatures = {}
         async with trio.open_nursery() as nursery:
             for peer_id in sign_party:
                 destination_address = self.node_info.lookup_node(peer_id)
-                nursery.start_soon(Wrappers.sign, self.send, dkg_key, destination_address, peer_id,
-                                   PROTOCOLS_ID[call_method], request_object.get(), signatures, self.default_timeout, self.semaphore)
+                nursery.start_soon(Wrappers.sign, self.send, session, destination_address, peer_id,
+                                   PROTOCOLS_ID[call_method], request_object.get(), signatures, self.default_timeout, self.semaphore,
+                                   not self.optimistic_verification)
+        logging.debug(
+            'Signatures dictionary response: \n%s', payload(signatures, pretty=True))
+        return await self.__aggregate_signatures(session, signatures)
+
+    async def request_signature_early(self, dkg_key: Dict, input_data: Dict, sign_party: List) -> Dict:
+        # ROAST style: sessions of exactly threshold signers run over every free peer, a peer is
+        # free again once it answered with a valid share, and the first complete session wins.
+        # A FROST session cannot be aggregated from a subset of its commitments, which is why
+        # shares are never mixed between sessions.
+        call_method = 'sign'
+        dkg_id = dkg_key['dkg_id']
+        threshold = dkg_key.get('threshold')
+        # Peers the NodeInfo does not know cannot sign; they are excluded up front
+        staking_ids = {}
+        for peer_id in sign_party:
+            info = self.node_info.lookup_node(peer_id)
+            if info is not None:
+                staking_ids[peer_id] = str(info['staking_id'])
+        if threshold is None or not set(sign_party).issubset(set(dkg_key['party'])) or \
+                len(staking_ids) < threshold:
+            response = {
+                'result': 'FAILED',
+                'signatures': None
+            }
+            return response
+
+        free = [peer_id for peer_id in sign_party if peer_id in staking_ids]
+        excluded = set(peer_id for peer_id in sign_party if peer_id not in staking_ids)
+        state = {'running': 0, 'sessions': 0,
+                 'response': None, 'signatures': {}}
+
+        async def sign_in_session(nursery: trio.Nursery, peer_id: str, session: SigningSession,
+                                  request: Dict, signatures: Dict) -> None:
+            destination_address = self.node_info.lookup_node(peer_id)
+            # Always verified here: a peer is freed for the next session as soon as it answers,
+            # so an unchecked share would let a malicious peer into that session too
+            await Wrappers.sign(self.send, session, destination_address, peer_id,
+                                PROTOCOLS_ID[call_method], request, signatures, self.default_timeout, self.semaphore,
+                                True)
+            if signatures[peer_id]['status'] == 'SUCCESSFUL' and peer_id not in excluded:
+                free.append(peer_id)
+                start_sessions(nursery)
+            else:
+                excluded.add(peer_id)
+
+        async def run_session(nursery: trio.Nursery, party: List[str]) -> None:
+            try:
+                commitments_dict = await self.commitment_manager.take(party)
+                signatures = {}
+                if len(commitments_dict) == len(party):
+                    parameters = {
+                        'dkg_id': dkg_id,
+                        'commitments_list': commitments_dict,
+                    }
+                    request = RequestObject(
+                        dkg_id, call_method, parameters, input_data).get()
+                    session = self.__new_session(dkg_key, commitments_dict)
+                    async with trio.open_nursery() as session_nursery:
+                        for peer_id in party:
+                            session_nursery.start_soon(
+                                sign_in_session, nursery, peer_id, session, request, signatures)
+                else:
+                    # No commitments left for some signers; the others can join another session
+                    free.extend(peer_id for peer_id in party
+                                if staking_ids[peer_id] in commitments_dict)
+                    excluded.update(peer_id for peer_id in party if peer_id not in free)
+                state['signatures'] = signatures
+                if len(signatures) == len(party) and \
+                        all(data['status'] == 'SUCCESSFUL' for data in signatures.values()):
+                    response = await self.__aggregate_signatures(session, signatures)
+                    if response['result'] == 'SUCCESSFUL':
+                        state['response'] = response
+                        nursery.cancel_scope.cancel()
+                        return
+                    malicious = [peer_id for peer_id, data in signatures.items()
+                                 if data['status'] != 'SUCCESSFUL']
+                    if len(malicious) == 0:
+                        # Valid shares that do not aggregate will not aggregate in any session
+                        nursery.cancel_scope.cancel()
+                        return
+                    for peer_id in malicious:
+                        excluded.add(peer_id)
+                        if peer_id in free:
+                            free.remove(peer_id)
+            finally:
+                state['running'] -= 1
+            start_sessions(nursery)
+            if state['running'] == 0 and len(free) < threshold:
+                # Nothing in flight and too few signers left to start another session
+                nursery.cancel_scope.cancel()
+
+        def start_sessions(nursery: trio.Nursery) -> None:
+            while len(free) >= threshold and state['response'] is None:
+                party = free[:threshold]
+                del free[:threshold]
+                state['running'] += 1
+                state['sessions'] += 1
+                nursery.start_soon(run_session, nursery, party)
+
+        async with trio.open_nursery() as nursery:
+            start_sessions(nursery)
+
+        logging.info('Early signing finished after %s sessions, excluded peers: %s',
+                     state['sessions'], payload(list(excluded)))
+        if state['response'] is not None:
+            state['response']['sessions'] = state['sessions']
+            return state['response']
+        response = {
+            'result': 'FAILED',
+            'signatures': state['signatures'],
+            'sessions': state['sessions'],
+        }
+        logging.info('Signature response: %s', payload(response))
+        return response
+
+    async def request_signatures(self, dkg_key: Dict, sign_requests: List[Tuple[Dict, Dict]],
+                                 sign_party: List) -> List[Dict]:
+        call_method = 'sign_batch'
+        dkg_id = dkg_key['dkg_id']
+        if len(sign_party) == 0 or not set(sign_party).issubset(set(dkg_key['party'])):
+            response = {
+                'result': 'FAILED',
+                'signatures': None
+            }
+            return [response for _ in sign_requests]
+
+        parameters = {
+            'dkg_id': dkg_id,
+            'commitments_lists': [commitments_dict for _, commitments_dict in sign_requests],
+        }
+        request_object = RequestObject(
+            dkg_id, call_method, parameters, [input_data for input_data, _ in sign_requests])
+
+        sessions = [self.__new_session(dkg_key, commitments_dict)
+                    for _, commitments_dict in sign_requests]
+        batch_signatures = {}
+        async with trio.open_nursery() as nursery:
+            for peer_id in sign_party:
+                destination_address = self.node_info.lookup_node(peer_id)
+                nursery.start_soon(Wrappers.sign_batch, self.send, sessions, destination_address, peer_id,
+                                   PROTOCOLS_ID[call_method], request_object.get(), batch_signatures, self.default_timeout, self.semaphore,
+                                   not self.optimistic_verification)
         logging.debug(
-            f'Signatures dictionary response: \n{pprint.pformat(signatures)}')
+            'Batch signatures dictionary response: \n%s', payload(batch_signatures, pretty=True))
+
+        responses = []
+        for index, session in enumerate(sessions):
+            signatures = {}
+            for peer_id, data in batch_signatures.items():
+                if data['status'] != 'SUCCESSFUL':
+                    signatures[peer_id] = data
+                elif len(data['signatures']) != len(sessions):
+                    signatures[peer_id] = {
+                        'status': 'FAILED',
+                        'error': f'Got {len(data["signatures"])} signatures for {len(sessions)} requests',
+                    }
+                else:
+                    signatures[peer_id] = data['signatures'][index]
+            responses.append(await self.__aggregate_signatures(session, signatures))
+        return responses
+
+    def __new_session(self, dkg_key: Dict, commitments_dict: Dict) -> SigningSession:
+        return SigningSession(dkg_key, commitments_dict, self.executor,
+                              self.verify_single_signature, self.verify_group_signature)
+
+    async def __aggregate_signatures(self, session: SigningSession, signatures: Dict) -> Dict:
+        if len(signatures) == 0:
+            return {
+                'result': 'FAILED',
+                'signatures': signatures
+            }
+        for data in signatures.values():
+            if data['status'] == 'SUCCESSFUL':
+                continue
+            response = {
+                'result': 'FAILED',
+                'signatures': signatures
+            }
+            logging.info('Signature response: %s', payload(response))
+            return response
+
         str_message = [i['hash'] for i in signatures.values()][0]
-        signs = [i['signature_data'] for i in signatures.values()]
         aggregated_public_nonces = [
             i['signature_data']['aggregated_public_nonce'] for i in signatures.values()]
         response = {
@@ -84,55 +287,87 @@ class SA(Libp2pBase):
             'signatures': None
         }
         if not len(set(aggregated_public_nonces)) == 1:
-            aggregated_public_nonce = pyfrost.aggregate_nonce(
-                str_message, commitments_dict, dkg_key['public_key'])
-            aggregated_public_nonce = pyfrost.Utils.pub_to_code(
-                aggregated_public_nonce)
+            aggregated_public_nonce = await session.aggregated_nonce_code(str_message)
             for peer_id, data in signatures.items():
                 if data['signature_data']['aggregated_public_nonce'] != aggregated_public_nonce:
                     data['status'] = 'MALICIOUS'
                     response['result'] = 'FAILED'
-        # TODO: result must be FAILED if any malicious status received
 
         if response['result'] == 'FAILED':
             response = {
                 'result': 'FAILED',
                 'signatures': signatures
             }
-            logging.info(f'Signature response: {response}')
+            logging.info('Signature response: %s', payload(response))
             return response
 
-        aggregated_public_nonce = pyfrost.Utils.code_to_pub(
-            aggregated_public_nonces[0])
-        aggregated_sign = pyfrost.aggregate_signatures(
-            str_message, signs, aggregated_public_nonce, dkg_key['public_key'])
-        if pyfrost.verify_group_signature(aggregated_sign):
+        try:
+            aggregated_sign = await session.aggregate(str_message, signatures)
+            is_valid = await session.verify_group(aggregated_sign)
+        except Exception as e:
+            # Unverified shares may be malformed rather than just wrong
+            logging.error(
+                f'SA aggregation => Exception occurred: {type(e).__name__}: {e}')
+            aggregated_sign = {}
+            is_valid = False
+        if is_valid:
             aggregated_sign['signatures'] = signatures
             aggregated_sign['result'] = 'SUCCESSFUL'
             logging.info(
                 f'Aggregated sign result: {aggregated_sign["result"]}')
         else:
+            if self.optimistic_verification:
+                # One group check failed; single share checks find the culprits
+                await self.__verify_shares(session, signatures)
+            aggregated_sign['signatures'] = signatures
             aggregated_sign['result'] = 'FAILED'
         return aggregated_sign
 
+    async def __verify_shares(self, session: SigningSession, signatures: Dict) -> None:
+        async with trio.open_nursery() as nursery:
+            for response in signatures.values():
+                nursery.start_soon(Wrappers.verify_signature, session, response)
+        logging.info('Shares marked malicious after a failed aggregate: %s', payload(
+            [peer_id for peer_id, data in signatures.items() if data['status'] == 'MALICIOUS']))
+
 
 class Wrappers:
     @staticmethod
-    async def sign(send: types.FunctionType, dkg_key, destination_address: Dict[str, str], destination_peer_id: PeerID, protocol_id: TProtocol,
-                   message: Dict, result: Dict = None, timeout: float = 5.0, semaphore: trio.Semaphore = None):
+    async def verify_signature(session: SigningSession, response: Dict) -> None:
+        try:
+            is_valid = await session.verify_share(response)
+        except Exception as e:
+            logging.error(
+                f'SA share verification => Exception occurred: {type(e).__name__}: {e}')
+            is_valid = False
+        if not is_valid:
+            response['status'] = 'MALICIOUS'
+
+    @staticmethod
+    async def sign(send: types.FunctionType, session: SigningSession, destination_address: Dict[str, str], destination_peer_id: PeerID, protocol_id: TProtocol,
+                   message: Dict, result: Dict = None, timeout: float = 5.0, semaphore: trio.Semaphore = None,
+                   verify: bool = True):
+
+        await send(destination_address, destination_peer_id, protocol_id,
+                   message, result, timeout, semaphore)
+
+        if not verify or result[destination_peer_id]['status'] != 'SUCCESSFUL':
+            return
+
+        await Wrappers.verify_signature(session, result[destination_peer_id])
+
+    @staticmethod
+    async def sign_batch(send: types.FunctionType, sessions: List[SigningSession], destination_address: Dict[str, str], destination_peer_id: PeerID, protocol_id: TProtocol,
+                         message: Dict, result: Dict = None, timeout: float = 5.0, semaphore: trio.Semaphore = None,
+                         verify: bool = True):
 
         await send(destination_address, destination_peer_id, protocol_id,
                    message, result, timeout, semaphore)
 
-        if result[destination_peer_id]['status'] != 'SUCCESSFUL':
+        if not verify or result[destination_peer_id]['status'] != 'SUCCESSFUL':
             return
 
-        sign = result[destination_peer_id]['signature_data']
-        msg = result[destination_peer_id]['hash']
-        commitments_dict = message['parameters']['commitments_list']
-        aggregated_public_nonce = pyfrost.Utils.code_to_pub(
-            sign['aggregated_public_nonce'])
-        res = pyfrost.verify_single_signature(
-            sign['id'], msg, commitments_dict, aggregated_public_nonce, dkg_key['public_shares'][str(sign['id'])], sign, dkg_key['public_key'])
-        if not res:
-            result[destination_peer_id]['status'] = 'MALICIOUS'
+        for session, response in zip(sessions, result[destination_peer_id]['signatures']):
+            if response['status'] != 'SUCCESSFUL':
+                continue
+            await Wrappers.verify_signature(session, response)
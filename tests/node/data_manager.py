@@ -1,18 +1,28 @@
-from typing import List
+from typing import Dict, List
 from frost_mpc.abstract.data_manager import DataManager
+from frost_mpc.common.nonce_store import NonceStore
 
 
 class NodeDataManager(DataManager):
     def __init__(self) -> None:
         super().__init__()
         self.__dkg_keys = {}
-        self.__nonces = []
+        self.__nonces = NonceStore()
 
     def set_nonces(self, nonces_list: List) -> None:
-        self.__nonces = nonces_list
+        self.__nonces.replace_values(nonces_list)
 
     def get_nonces(self):
-        return self.__nonces
+        return self.__nonces.values()
+
+    def add_nonces(self, nonces: Dict[str, Dict], replace: bool = False, max_size: int = None) -> int:
+        return self.__nonces.add(nonces, replace, max_size)
+
+    def pop_nonce(self, commitment_key: str) -> Dict:
+        return self.__nonces.pop(commitment_key)
+
+    def get_nonces_count(self) -> int:
+        return len(self.__nonces)
 
     def set_dkg_key(self, key, value) -> None:
         self.__dkg_keys[key] = value
@@ -1,6 +1,6 @@
 from frost_mpc.common.libp2p_protocols import PROTOCOLS_ID
 VALIDATED_CALLERS = {
-    '16Uiu2HAmGVUb3nZ3yaKNpt5kH7KZccKrPaHmG1qTB48QvLdr7igH': [PROTOCOLS_ID['round1'], PROTOCOLS_ID['round2'], PROTOCOLS_ID['round3'], PROTOCOLS_ID['generate_nonces'], PROTOCOLS_ID['sign']]
+    '16Uiu2HAmGVUb3nZ3yaKNpt5kH7KZccKrPaHmG1qTB48QvLdr7igH': [PROTOCOLS_ID['round1'], PROTOCOLS_ID['round2'], PROTOCOLS_ID['round3'], PROTOCOLS_ID['generate_nonces'], PROTOCOLS_ID['sign'], PROTOCOLS_ID['sign_batch']]
 }
 
 SECRETS = {'16Uiu2HAkv3kvbv1LjsxQ62kXE8mmY16R97svaMFhZkrkXaXSBSTq': '7f31124800890e662580f2b3fcac0b6200f1a7d9dc343bef6cbea8e9e02a5a5b',
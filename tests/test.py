@@ -1,17 +1,15 @@
 from frost_mpc.sa import SA
 from frost_mpc.dkg import Dkg
-from frost_mpc.common.utils import Utils, RequestObject
-from frost_mpc.common.libp2p_protocols import PROTOCOLS_ID
+from frost_mpc.common.utils import Utils
 from test_config import PRIVATE, PEER_INFO
 from node.node_info import NodeInfo
 from libp2p.peer.id import ID as PeerID
-from typing import List, Dict
+from typing import List
 import timeit
 import sys
 import trio
 import logging
 import time
-import pprint
 import os
 
 
@@ -34,56 +32,6 @@ async def run_random_party_dkg(dkg: Dkg, all_nodes: List[str], threshold: int, n
     return dkg_key
 
 
-async def maintain_nonces(sa: SA, peer_ids: List[str], nonces: Dict[str, List], node_info: NodeInfo, min_number_of_nonces: int = 10) -> None:
-    call_method = 'generate_nonces'
-    average_time = []
-    for peer_id in peer_ids:
-        nonces.setdefault(peer_id, [])
-        start_time = timeit.default_timer()
-        req_id = Utils.generate_random_uuid()
-        parameters = {
-            'number_of_nonces': min_number_of_nonces * 10,
-        }
-        request_object = RequestObject(req_id, call_method, parameters)
-        nonces_response = {}
-        destination_address = node_info.lookup_node(peer_id)
-        await sa.send(destination_address, peer_id,
-                      PROTOCOLS_ID[call_method], request_object.get(), nonces_response, 50, None)
-
-        logging.debug(
-            f'Nonces dictionary response: \n{pprint.pformat(nonces_response)}')
-        nonces[peer_id] += nonces_response[peer_id]['nonces']
-        end_time = timeit.default_timer()
-        logging.info(
-            f'Getting nonces from peer ID {peer_id} takes {end_time-start_time} seconds.')
-        average_time.append(end_time-start_time)
-    average_time = sum(average_time) / len(average_time)
-    logging.info(f'Nonce generation average time: {average_time}')
-
-
-async def get_commitments(party: List[str], nonces: Dict[str, List], node_info: NodeInfo, timeout: int = 5) -> Dict:
-    commitments_dict = {}
-    peer_ids_with_timeout = {}
-    for peer_id in party:
-        with trio.move_on_after(timeout) as cancel_scope:
-            while not nonces.get(peer_id):
-                await trio.sleep(0.1)
-            commitment = nonces[peer_id].pop()
-            commitments_dict[str(node_info.lookup_node(
-                peer_id)['staking_id'])] = commitment
-        if cancel_scope.cancelled_caught:
-            timeout_response = {
-                'status': 'TIMEOUT',
-                'error': 'Communication timed out',
-            }
-            peer_ids_with_timeout[peer_id] = timeout_response
-
-    if len(peer_ids_with_timeout) > 0:
-        logging.error(
-            f'get_commitments => Timeout error occurred. peer ids with timeout: {peer_ids_with_timeout}')
-    return commitments_dict
-
-
 async def run(total_node_number: int, threshold: int, n: int, num_signs: int) -> None:
     node_info = NodeInfo()
 
@@ -91,12 +39,16 @@ async def run(total_node_number: int, threshold: int, n: int, num_signs: int) ->
 
     dkg = Dkg(PEER_INFO, PRIVATE, node_info, max_workers=0, default_timeout=50)
     sa = SA(PEER_INFO, PRIVATE, node_info, max_workers=0,
-            default_timeout=50, host=dkg.host)
+            default_timeout=50, host=dkg.host, connection_pool=dkg.connection_pool)
     app_name = 'simple_oracle'
-    nonces = {}
     async with trio.open_nursery() as nursery:
         nursery.start_soon(dkg.run)
-        await maintain_nonces(sa, all_nodes, nonces, node_info)
+        nursery.start_soon(sa.commitment_manager.run)
+        start_time = timeit.default_timer()
+        await sa.commitment_manager.refill(all_nodes)
+        end_time = timeit.default_timer()
+        logging.info(
+            f'Getting nonces from {len(all_nodes)} peers takes {end_time - start_time} seconds.')
         start_time = timeit.default_timer()
         dkg_key = await run_random_party_dkg(dkg, all_nodes, threshold, n, app_name, node_info)
         end_time = timeit.default_timer()
@@ -109,7 +61,7 @@ async def run(total_node_number: int, threshold: int, n: int, num_signs: int) ->
         for i in range(num_signs):
             logging.info(
                 f'Get signature {i} for app {app_name} with DKG id {dkg_id}')
-            commitments_dict = await get_commitments(dkg_key['party'], nonces, node_info)
+            commitments_dict = await sa.commitment_manager.take(dkg_key['party'])
             now = timeit.default_timer()
             input_data = {
                 'data': 'Hi there!'
@@ -122,6 +74,14 @@ async def run(total_node_number: int, threshold: int, n: int, num_signs: int) ->
                 f'Requesting signature {i} takes {then - now} seconds')
             logging.info(f'Signature data: {signature}')
 
+        # Early signing takes the first threshold signers that answer, in sessions of their own
+        now = timeit.default_timer()
+        signature = await sa.request_signature_early(dkg_key, {'data': 'Hi there!'}, dkg_key['party'])
+        then = timeit.default_timer()
+        logging.info(
+            f'Requesting an early signature takes {then - now} seconds after {signature.get("sessions")} sessions')
+        logging.info(f'Early signature data: {signature}')
+
         dkg.stop()
         nursery.cancel_scope.cancel()
 
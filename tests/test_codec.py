@@ -0,0 +1,146 @@
+from frost_mpc.common.codec import (CodecError, FramedDecoder, CachedMessage, MAX_DEPTH, encode, decode,
+                                    encode_framed, encode_message, decode_message)
+from frost_mpc.common.libp2p_protocols import PROTOCOLS_ID, BINARY_PROTOCOLS_ID
+
+import unittest
+import json
+
+POINT = (3 << 256) + 12345
+SCALAR = (1 << 255) + 7
+
+
+def sample_message() -> dict:
+    return {
+        'request_id': 'b9f5c1f2-round2',
+        'method': 'round2',
+        'parameters': {
+            'dkg_id': 'b9f5c1f2',
+            'public_fx': [POINT, (2 << 256) + 1, POINT],
+            'signature': SCALAR,
+            'big': -(1 << 300),
+            'small': [0, 1, -1, 63, 64, (1 << 63) - 1, -(1 << 63)],
+            'validation': 'deadbeef00',
+            'peer_id': '16Uiu2HAmGVUb3nZ3yaKNpt5kH7KZccKrPaHmG1qTB48QvLdr7igH',
+            'text': 'ÄÖ ünïcode',
+            'empty': {'list': [], 'dict': {}, 'str': ''},
+            'flags': [True, False, None],
+            'ratio': 0.25,
+        },
+    }
+
+
+class CodecTest(unittest.TestCase):
+    def test_round_trip(self):
+        message = sample_message()
+        self.assertEqual(decode(encode(message)), message)
+
+    def test_matches_json_semantics(self):
+        # Keys become strings and tuples become lists, as with json.dumps
+        value = {1: (1, 2), None: 'x', True: 'y'}
+        self.assertEqual(decode(encode(value)), json.loads(json.dumps(value)))
+
+    def test_bytes_round_trip(self):
+        self.assertEqual(decode(encode({'raw': b'\x00\xff'})), {'raw': b'\x00\xff'})
+
+    def test_unsupported_type(self):
+        with self.assertRaises(CodecError):
+            encode({'value': object()})
+
+    def test_truncated(self):
+        data = encode(sample_message())
+        for size in range(len(data)):
+            with self.assertRaises(CodecError):
+                decode(data[:size])
+
+    def test_trailing_data(self):
+        with self.assertRaises(CodecError):
+            decode(encode([1, 2]) + b'\x00')
+
+    def test_unknown_version_and_tag(self):
+        with self.assertRaises(CodecError):
+            decode(b'\x7f\x00')
+        with self.assertRaises(CodecError):
+            decode(bytes([encode(None)[0], 0x7f]))
+
+    def test_depth_limit(self):
+        value = []
+        for _ in range(MAX_DEPTH):
+            value = [value]
+        self.assertEqual(decode(encode(value)), value)
+        with self.assertRaises(CodecError):
+            decode(encode([value]))
+
+    def test_deep_input_does_not_exhaust_the_stack(self):
+        # A hand-made payload far deeper than the recursion limit
+        data = bytes([encode(None)[0]]) + b'\x0a\x01' * 100000 + b'\x00'
+        with self.assertRaises(CodecError):
+            decode(data)
+
+
+class FramedDecoderTest(unittest.TestCase):
+    def feed(self, frames, chunk_size: int, on_item=None) -> FramedDecoder:
+        data = b''.join(frames)
+        decoder = FramedDecoder(on_item)
+        for start in range(0, len(data), chunk_size):
+            decoder.feed(data[start:start + chunk_size])
+        return decoder
+
+    def test_list_stream(self):
+        message = {'status': 'SUCCESSFUL', 'broadcast': [{'id': i, 'share': SCALAR} for i in range(5)]}
+        for chunk_size in (1, 7, 1 << 16):
+            decoder = self.feed(encode_framed(message, 'broadcast'), chunk_size)
+            self.assertTrue(decoder.done)
+            self.assertEqual(decoder.message, message)
+
+    def test_dict_stream(self):
+        message = {'status': 'SUCCESSFUL', 'nonces': {'1': POINT, '2': SCALAR}}
+        decoder = self.feed(encode_framed(message, 'nonces'), 3)
+        self.assertEqual(decoder.message, message)
+
+    def test_on_item(self):
+        items = []
+        message = {'status': 'SUCCESSFUL', 'broadcast': [1, 2, 3]}
+        decoder = self.feed(encode_framed(message, 'broadcast'), 2, items.append)
+        self.assertEqual(items, [1, 2, 3])
+        self.assertEqual(decoder.message, {'status': 'SUCCESSFUL'})
+
+    def test_missing_stream_key(self):
+        message = {'status': 'FAILED', 'error': 'x'}
+        self.assertEqual(self.feed(encode_framed(message, 'broadcast'), 4).message, message)
+
+    def test_truncated(self):
+        data = b''.join(encode_framed({'broadcast': [1, 2, 3]}, 'broadcast'))
+        decoder = FramedDecoder()
+        decoder.feed(data[:-1])
+        self.assertFalse(decoder.done)
+
+    def test_trailing_data(self):
+        decoder = FramedDecoder()
+        with self.assertRaises(CodecError):
+            decoder.feed(b''.join(encode_framed({'a': 1})) + b'\x01')
+
+    def test_bad_version(self):
+        with self.assertRaises(CodecError):
+            FramedDecoder().feed(b'\x7f')
+
+    def test_malformed_frame(self):
+        with self.assertRaises(CodecError):
+            FramedDecoder().feed(bytes([2, 2, 0x7f, 0x7f]))
+
+
+class MessageTest(unittest.TestCase):
+    def test_protocols(self):
+        message = sample_message()
+        for protocol_id in (PROTOCOLS_ID['round2'], BINARY_PROTOCOLS_ID['round2']):
+            self.assertEqual(decode_message(encode_message(message, protocol_id), protocol_id), message)
+
+    def test_cached_message(self):
+        cached = CachedMessage(sample_message())
+        protocol_id = BINARY_PROTOCOLS_ID['round2']
+        self.assertIs(encode_message(cached, protocol_id), encode_message(cached, protocol_id))
+        self.assertEqual(encode_message(cached, PROTOCOLS_ID['round2']),
+                         encode_message(sample_message(), PROTOCOLS_ID['round2']))
+
+
+if __name__ == '__main__':
+    unittest.main()